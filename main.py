@@ -2,4 +2,4 @@ from src.game import Game
 
 if __name__ == "__main__":
     game = Game()
-    game.run(game.game_mode)
+    game.play()
@@ -16,6 +16,14 @@ WIDTH, HEIGHT = BOARD_SIZE, BOARD_SIZE
 ROWS, COLS = 8, 8
 SQUARE_SIZE = WIDTH // COLS
 
+# Frame rate cap of the menu and game loops (display rate)
+FPS = 60
+
+# Computer player: seconds it may think per move, and a depth cap high enough that
+# the time budget, not the depth, ends the search
+AI_TIME_LIMIT = 1.5
+AI_MAX_DEPTH = 12
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -23,6 +31,7 @@ LIGHT_BROWN = (240, 217, 181)
 DARK_BROWN = (181, 136, 99)
 CLEAR_BLUE = (135, 206, 235)
 CLEAR_GREEN = (144, 238, 144)
+YELLOW = (255, 255, 0)  # Hovered menu labels
 
 # Load and scale pieces
 PIECES = {
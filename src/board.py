@@ -1,8 +1,196 @@
-from typing import List, Optional, Tuple, Dict, Any
+import random
+
+from typing import List, Optional, Tuple, Dict, Any, Iterable, Iterator
 
 from settings import *
 
 from src.pieces import *
+from src.piece_square_tables import PIECE_SQUARE_MIDGAME, PIECE_SQUARE_ENDGAME
+
+# Zobrist keys: one random 64-bit number per (color, piece type, square), plus one
+# for black to move. Fixed seed so position keys are reproducible between runs.
+_zobrist_rng = random.Random(0x5A0B)
+ZOBRIST_PIECES = {
+    color: tuple(
+        tuple(_zobrist_rng.getrandbits(64) for _ in range(64)) for _ in range(6)
+    )
+    for color in ("w", "b")
+}
+ZOBRIST_BLACK_TO_MOVE = _zobrist_rng.getrandbits(64)
+# Every square of the board as a bitboard
+ALL_SQUARES = (1 << 64) - 1
+
+# Castling rights still available, as bits of Board.castling_rights
+CASTLE_W_KINGSIDE, CASTLE_W_QUEENSIDE, CASTLE_B_KINGSIDE, CASTLE_B_QUEENSIDE = (
+    1,
+    2,
+    4,
+    8,
+)
+ALL_CASTLING_RIGHTS = 0b1111
+CASTLING_RIGHTS = {
+    "w": {"kingside": CASTLE_W_KINGSIDE, "queenside": CASTLE_W_QUEENSIDE},
+    "b": {"kingside": CASTLE_B_KINGSIDE, "queenside": CASTLE_B_QUEENSIDE},
+}
+# One key per castling right, XORed into one key per value of castling_rights:
+# each right doubles the table with its key folded into the upper half
+_castling_keys = [0]
+for _ in range(4):
+    _right_key = _zobrist_rng.getrandbits(64)
+    _castling_keys += [key ^ _right_key for key in _castling_keys]
+ZOBRIST_CASTLING = tuple(_castling_keys)
+# One key per file of a capturable en passant square (repetition keys only)
+ZOBRIST_EN_PASSANT = tuple(_zobrist_rng.getrandbits(64) for _ in range(8))
+
+# Home squares whose king/rook moving away (or rook being captured) loses rights:
+# both of a color's rights for the king squares, one right for each corner
+CASTLING_SQUARES = {
+    (7, 4): CASTLE_W_KINGSIDE | CASTLE_W_QUEENSIDE,
+    (0, 4): CASTLE_B_KINGSIDE | CASTLE_B_QUEENSIDE,
+    (7, 7): CASTLE_W_KINGSIDE,
+    (7, 0): CASTLE_W_QUEENSIDE,
+    (0, 7): CASTLE_B_KINGSIDE,
+    (0, 0): CASTLE_B_QUEENSIDE,
+}
+
+
+def _on_board_targets(
+    row: int, col: int, offsets: Tuple[Tuple[int, int], ...]
+) -> Tuple[Tuple[int, int], ...]:
+    """Squares reached from (row, col) by each offset, dropping off-board ones."""
+    return tuple(
+        (row + dr, col + dc)
+        for dr, dc in offsets
+        if 0 <= row + dr < ROWS and 0 <= col + dc < COLS
+    )
+
+
+def _rays(
+    row: int, col: int, directions: Tuple[Tuple[int, int], ...]
+) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    """Squares along each direction from (row, col), nearest first, up to the edge."""
+    rays = []
+    for dr, dc in directions:
+        ray = []
+        r, c = row + dr, col + dc
+        while 0 <= r < ROWS and 0 <= c < COLS:
+            ray.append((r, c))
+            r += dr
+            c += dc
+        if ray:
+            rays.append(tuple(ray))
+    return tuple(rays)
+
+
+# Attack lookup tables indexed by square = row * 8 + col, precomputed once so
+# is_check only walks squares that exist instead of bounds-checking offsets
+_SQUARES = [(row, col) for row in range(ROWS) for col in range(COLS)]
+
+# (row, col) offsets each table is built from; their order is the order moves are
+# generated in
+_KNIGHT_JUMPS = ((-2, -1), (-2, 1), (2, -1), (2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2))
+_KING_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1))
+_PAWN_CAPTURE_STEPS = {"w": ((-1, -1), (-1, 1)), "b": ((1, -1), (1, 1))}
+_ORTHOGONAL_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+_DIAGONAL_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+KNIGHT_SQUARES = tuple(_on_board_targets(r, c, _KNIGHT_JUMPS) for r, c in _SQUARES)
+KING_SQUARES = tuple(_on_board_targets(r, c, _KING_STEPS) for r, c in _SQUARES)
+# Squares an enemy pawn must stand on to attack a king of the given color:
+# black pawns attack downwards (+1 row), white pawns upwards (-1 row)
+PAWN_ATTACK_SQUARES = {
+    color: tuple(_on_board_targets(r, c, steps) for r, c in _SQUARES)
+    for color, steps in _PAWN_CAPTURE_STEPS.items()
+}
+ORTHOGONAL_RAYS = tuple(_rays(r, c, _ORTHOGONAL_DIRECTIONS) for r, c in _SQUARES)
+DIAGONAL_RAYS = tuple(_rays(r, c, _DIAGONAL_DIRECTIONS) for r, c in _SQUARES)
+
+
+def _square_mask(squares) -> int:
+    """Bitboard of the given (row, col) squares, bit = row * 8 + col."""
+    return sum(1 << (r * 8 + c) for r, c in squares)
+
+
+# The same tables as bitboards, so is_check tests a whole set of squares against a
+# piece bitboard with one AND
+KNIGHT_ATTACKS = tuple(_square_mask(targets) for targets in KNIGHT_SQUARES)
+KING_ATTACKS = tuple(_square_mask(targets) for targets in KING_SQUARES)
+PAWN_ATTACKS = {
+    color: tuple(_square_mask(targets) for targets in PAWN_ATTACK_SQUARES[color])
+    for color in ("w", "b")
+}
+# Per square: the knight's and the king's target squares, each with its bit, so
+# move generation tests a target against the own occupancy with one AND
+KNIGHT_TARGETS = tuple(
+    tuple(((r, c), 1 << (r * 8 + c)) for r, c in targets) for targets in KNIGHT_SQUARES
+)
+KING_TARGETS = tuple(
+    tuple(((r, c), 1 << (r * 8 + c)) for r, c in targets) for targets in KING_SQUARES
+)
+# Per color and square: a pawn's pushes (one step, plus two from its start row),
+# nearest first, and its diagonal captures, each target with its square bit
+PAWN_PUSHES = {
+    color: tuple(
+        tuple(
+            ((r + step * n, c), 1 << ((r + step * n) * 8 + c))
+            for n in ((1, 2) if r == start_row else (1,))
+            if 0 <= r + step * n < ROWS
+        )
+        for r, c in _SQUARES
+    )
+    for color, step, start_row in (("w", -1, 6), ("b", 1, 1))
+}
+PAWN_CAPTURES = {
+    color: tuple(
+        tuple(((r, c), 1 << (r * 8 + c)) for r, c in targets)
+        for targets in PAWN_ATTACK_SQUARES[color]
+    )
+    for color in ("w", "b")
+}
+# Per square: its left and right neighbours, where a pawn that could capture en
+# passant after a double step to that square stands
+EN_PASSANT_NEIGHBOURS = tuple(
+    _square_mask(_on_board_targets(r, c, ((0, -1), (0, 1)))) for r, c in _SQUARES
+)
+# Per square: each of its rays as a bitboard, orthogonal and diagonal
+ORTHOGONAL_RAY_MASKS = tuple(
+    tuple(_square_mask(ray) for ray in rays) for rays in ORTHOGONAL_RAYS
+)
+DIAGONAL_RAY_MASKS = tuple(
+    tuple(_square_mask(ray) for ray in rays) for rays in DIAGONAL_RAYS
+)
+
+# Per slider type and square: each ray as (squares nearest first, bitboard, whether
+# it runs to higher squares, steps from the origin keyed by square bit)
+SLIDER_LINES = {
+    type_id: tuple(
+        tuple(
+            (
+                ray,
+                _square_mask(ray),
+                ray[0][0] * 8 + ray[0][1] > square,
+                {1 << (r * 8 + c): steps for steps, (r, c) in enumerate(ray, 1)},
+            )
+            for ray in rays
+        )
+        for square, rays in enumerate(table)
+    )
+    for type_id, table in (
+        (ROOK, ORTHOGONAL_RAYS),
+        (BISHOP, DIAGONAL_RAYS),
+        (QUEEN, tuple(map(tuple.__add__, ORTHOGONAL_RAYS, DIAGONAL_RAYS))),
+    )
+}
+
+# Top-left screen pixel of every square, indexed [flipped][row * 8 + col]; the
+# flipped view (black's perspective) mirrors both axes
+SCREEN_COORDS = (
+    tuple((c * SQUARE_SIZE, r * SQUARE_SIZE) for r, c in _SQUARES),
+    tuple(
+        ((COLS - 1 - c) * SQUARE_SIZE, (ROWS - 1 - r) * SQUARE_SIZE)
+        for r, c in _SQUARES
+    ),
+)
 
 
 class Board:
@@ -11,6 +199,21 @@ class Board:
     special rules, and game state checks.
     """
 
+    __slots__ = (
+        "board",
+        "white_king",
+        "black_king",
+        "castling_rights",
+        "pieces",
+        "zobrist_key",
+        "bitboards",
+        "occupied",
+        "psqt_midgame",
+        "psqt_endgame",
+        "promotion_queens",
+        "legal_moves_cache",
+    )
+
     def __init__(self) -> None:
         """
         Initializes the chessboard with pieces in their starting positions.
@@ -19,13 +222,231 @@ class Board:
         self.board = self.create_board()
         self.white_king = (7, 4)  # Track king positions for check/checkmate
         self.black_king = (0, 4)
-        self.king_moved = {"w": False, "b": False}
-        self.rook_moved = {
-            "w_kingside": False,
-            "w_queenside": False,
-            "b_kingside": False,
-            "b_queenside": False,
-        }
+        # Castling rights not lost yet (CASTLE_* bits); one int to snapshot
+        self.castling_rights = ALL_CASTLING_RIGHTS
+        self.refresh_state()
+
+    def refresh_state(self) -> None:
+        """
+        Rebuilds the state derived from the board matrix: the per-color piece lists,
+        the Zobrist key (piece placement and castling rights), the bitboards and the
+        running material + piece-square scores. Must be called after the matrix has been edited directly (e.g. undo/redo).
+        """
+        self.pieces = {"w": [], "b": []}
+        self.zobrist_key = 0
+        # One 64-bit occupancy mask per color and Piece.type_id; bit = row * 8 + col
+        self.bitboards = {"w": [0] * 6, "b": [0] * 6}
+        # Union of each color's six bitboards, kept in step with them
+        self.occupied = {"w": 0, "b": 0}
+        # Material + piece-square score, white minus black, per game phase
+        self.psqt_midgame = 0
+        self.psqt_endgame = 0
+        # Queen a pawn turns into in make_move, reused whenever it promotes again
+        self.promotion_queens = {}
+        # legal_moves results of the position being played, see legal_moves
+        self.legal_moves_cache = {}
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = self.board[row][col]
+                if piece is not None:
+                    self.pieces[piece.color].append(piece)
+                    self.toggle_piece(piece, row, col)
+        self.zobrist_key ^= self.castling_key()
+
+    def castling_key(self) -> int:
+        """
+        Returns the Zobrist contribution of the castling rights still available.
+
+        Returns:
+            int: XOR of the keys of every right whose king and rook have not moved.
+        """
+        return ZOBRIST_CASTLING[self.castling_rights]
+
+    def toggle_piece(self, piece: Piece, row: int, col: int) -> None:
+        """
+        Adds or removes (XOR) a piece on (row, col) in the Zobrist key and bitboards,
+        and adds or subtracts its material + piece-square value in the running scores.
+        Does not touch the board matrix or the piece lists.
+
+        Args:
+            piece (Piece): The piece placed on or lifted off the square.
+            row (int): Row of the square.
+            col (int): Column of the square.
+        """
+        square = row * 8 + col
+        color, type_id = piece.color, piece.type_id
+        bit = 1 << square
+        boards = self.bitboards[color]
+
+        # Lifting the piece (its bit is set) takes its value back off its side; the
+        # tables already carry black's values negated
+        sign = -1 if boards[type_id] & bit else 1
+        self.psqt_midgame += sign * PIECE_SQUARE_MIDGAME[color][type_id][square]
+        self.psqt_endgame += sign * PIECE_SQUARE_ENDGAME[color][type_id][square]
+
+        self.zobrist_key ^= ZOBRIST_PIECES[color][type_id][square]
+        boards[type_id] ^= bit
+        self.occupied[color] ^= bit
+
+    def position_key(self, turn: str, last_move: Optional[dict] = None) -> int:
+        """
+        Returns an integer key identifying the position for repetition checks:
+        piece placement, castling rights, side to move and en passant (if valid).
+
+        Args:
+            turn (str): Side to move ('w' or 'b').
+            last_move (Optional[dict]): Last move-history entry (with "piece",
+                "start" and "end"), used to detect a capturable en passant square.
+
+        Returns:
+            int: The Zobrist key with side to move and en passant file folded in.
+        """
+        # Piece placement and castling rights, maintained incrementally
+        key = self.zobrist_key
+
+        # Whose turn
+        if turn == "b":
+            key ^= ZOBRIST_BLACK_TO_MOVE
+
+        # En passant: only after a double pawn move, and only if an enemy pawn
+        # stands beside it (one AND with that side's pawn bitboard)
+        if last_move is not None and last_move["piece"].type_id == PAWN:
+            start_row, start_col = last_move["start"]
+            end_row, end_col = last_move["end"]
+            if abs(start_row - end_row) == 2:
+                enemy = "b" if last_move["piece"].color == "w" else "w"
+                if (
+                    EN_PASSANT_NEIGHBOURS[end_row * 8 + end_col]
+                    & self.bitboards[enemy][PAWN]
+                ):
+                    key ^= ZOBRIST_EN_PASSANT[start_col]
+
+        return key
+
+    def legal_moves(
+        self,
+        piece: Piece,
+        last_move: Optional[Tuple[Any, Tuple[int, int], Tuple[int, int]]] = None,
+    ) -> List[Tuple[int, int]]:
+        """
+        Returns piece.valid_moves(self, last_move), memoized for the position. The
+        key is the Zobrist key (placement and castling rights), the piece's square
+        and the last move (en passant), which together determine the moves. The
+        cache is emptied by move_piece and refresh_state; the returned list is
+        shared and must not be modified.
+
+        Args:
+            piece (Piece): The piece to move.
+            last_move (Optional[tuple]): The last move made (piece, start, end).
+
+        Returns:
+            List[Tuple[int, int]]: The piece's legal destinations.
+        """
+        key = (self.zobrist_key, piece.row * 8 + piece.col, last_move)
+        moves = self.legal_moves_cache.get(key)
+        if moves is None:
+            moves = self.legal_moves_cache[key] = piece.valid_moves(self, last_move)
+        return moves
+
+    def step_moves(self, piece: Piece) -> List[Tuple[int, int]]:
+        """
+        Returns the squares a knight or king (castling aside) reaches in one step,
+        not yet checked for king safety: the precomputed targets of its square that
+        are not occupied by its own side.
+
+        Args:
+            piece (Piece): The knight or king.
+
+        Returns:
+            List[Tuple[int, int]]: Pseudo-legal destinations.
+        """
+        own = self.occupied[piece.color]
+        table = KING_TARGETS if piece.type_id == KING else KNIGHT_TARGETS
+        return [
+            target for target, bit in table[piece.row * 8 + piece.col] if not bit & own
+        ]
+
+    def pawn_moves(
+        self,
+        piece: Piece,
+        last_move: Optional[Tuple[Any, Tuple[int, int], Tuple[int, int]]] = None,
+    ) -> List[Tuple[int, int]]:
+        """
+        Returns a pawn's pushes, captures and en passant capture, not yet checked
+        for king safety. Push and capture targets come from per-square tables and
+        are tested against the occupancy with one AND each.
+
+        Args:
+            piece (Piece): The pawn.
+            last_move (Optional[tuple]): The last move made (piece, start, end),
+                used for en passant.
+
+        Returns:
+            List[Tuple[int, int]]: Pseudo-legal destinations.
+        """
+        color = piece.color
+        square = piece.row * 8 + piece.col
+        enemy = self.occupied["b" if color == "w" else "w"]
+        occupied = enemy | self.occupied[color]
+
+        moves = []
+        # The double step needs the single step's square empty too
+        for target, bit in PAWN_PUSHES[color][square]:
+            if bit & occupied:
+                break
+            moves.append(target)
+        for target, bit in PAWN_CAPTURES[color][square]:
+            if bit & enemy:
+                moves.append(target)
+
+        # En passant: an enemy pawn just double-stepped to the square beside it
+        if last_move:
+            last_piece, last_start, last_end = last_move
+            if (
+                last_piece is not None
+                and last_piece.type_id == PAWN
+                and abs(last_start[0] - last_end[0]) == 2
+                and last_end[0] == piece.row
+                and abs(last_end[1] - piece.col) == 1
+            ):
+                target = (piece.row + piece.direction, last_end[1])
+                if not occupied >> (target[0] * 8 + target[1]) & 1:
+                    moves.append(target)
+
+        return moves
+
+    def slider_moves(self, piece: Piece) -> List[Tuple[int, int]]:
+        """
+        Returns the squares a rook, bishop or queen reaches, not yet checked for
+        king safety. Each ray stops at its nearest occupied square, found with one
+        AND against the occupancy bitboard, and is cut there with a single slice.
+
+        Args:
+            piece (Piece): The sliding piece.
+
+        Returns:
+            List[Tuple[int, int]]: Pseudo-legal destinations, ray by ray, nearest first.
+        """
+        own = self.occupied[piece.color]
+        occupied = own | self.occupied["b" if piece.color == "w" else "w"]
+
+        moves = []
+        for ray, mask, ascending, steps in SLIDER_LINES[piece.type_id][
+            piece.row * 8 + piece.col
+        ]:
+            blockers = mask & occupied
+            if not blockers:
+                moves += ray  # Open up to the edge
+                continue
+            if ascending:
+                nearest = blockers & -blockers
+            else:
+                nearest = 1 << (blockers.bit_length() - 1)
+            # The blocker itself is taken only if it is an enemy piece
+            moves += (
+                ray[: steps[nearest] - 1] if nearest & own else ray[: steps[nearest]]
+            )
+        return moves
 
     def clone(self) -> "Board":
         """
@@ -45,10 +466,48 @@ class Board:
         ]
         new_board.white_king = self.white_king
         new_board.black_king = self.black_king
-        new_board.king_moved = self.king_moved.copy()
-        new_board.rook_moved = self.rook_moved.copy()
+        new_board.castling_rights = self.castling_rights
+        new_board.refresh_state()
         return new_board
 
+    @classmethod
+    def blank(cls) -> "Board":
+        """
+        Creates an empty board (no pieces, castling flags reset), meant to be filled
+        later with copy_into().
+
+        Returns:
+            Board: A new empty Board instance.
+        """
+        board = cls.__new__(cls)
+        board.board = [[None for _ in range(COLS)] for _ in range(ROWS)]
+        board.white_king = (7, 4)
+        board.black_king = (0, 4)
+        board.castling_rights = ALL_CASTLING_RIGHTS
+        board.refresh_state()
+        return board
+
+    def copy_into(self, dst: "Board") -> "Board":
+        """
+        Copies this board's state into an existing Board, reusing its row lists and
+        flag dictionaries instead of allocating a new Board.
+
+        Args:
+            dst (Board): The board to overwrite.
+
+        Returns:
+            Board: `dst`, now holding the same position as this board.
+        """
+        for src_row, dst_row in zip(self.board, dst.board):
+            dst_row[:] = [
+                piece.clone() if piece is not None else None for piece in src_row
+            ]
+        dst.white_king = self.white_king
+        dst.black_king = self.black_king
+        dst.castling_rights = self.castling_rights
+        dst.refresh_state()
+        return dst
+
     def create_board(self) -> List[List[Optional[Piece]]]:
         """
         Creates the initial chessboard setup with pieces in their starting positions.
@@ -143,10 +602,7 @@ class Board:
         Convert board coordinates (row, col) -> top-left screen pixel (x, y).
         If flipped is True it returns coords for black's perspective (board rotated 180°).
         """
-        if not flipped:
-            return col * SQUARE_SIZE, row * SQUARE_SIZE
-        # flipped: mirror both axes
-        return (COLS - 1 - col) * SQUARE_SIZE, (ROWS - 1 - row) * SQUARE_SIZE
+        return SCREEN_COORDS[flipped][row * 8 + col]
 
     def from_screen_coords(self, x: int, y: int, flipped: bool) -> Tuple[int, int]:
         """Convert screen pixel coordinates back to board (row, col)."""
@@ -162,6 +618,7 @@ class Board:
         selected_piece: Piece,
         last_move: Tuple[Any, Tuple[int, int], Tuple[int, int]],
         flipped: bool = False,
+        valid_moves: Optional[Iterable[Tuple[int, int]]] = None,
     ) -> None:
         """
         Highlights valid moves for the selected piece.
@@ -170,6 +627,8 @@ class Board:
             screen (pygame.Surface): The game display surface.
             selected_piece (Piece): The currently selected piece.
             last_move (tuple): The last move made (piece, start_pos, end_pos).
+            valid_moves (Optional[Iterable]): The piece's moves if already known;
+                                              computed from last_move otherwise.
 
         Returns:
             None
@@ -177,7 +636,8 @@ class Board:
         if not selected_piece:
             return  # No piece selected, exit early
 
-        valid_moves = selected_piece.valid_moves(self, last_move)
+        if valid_moves is None:
+            valid_moves = self.legal_moves(selected_piece, last_move)
         current_pos = (selected_piece.row, selected_piece.col)
 
         for move in valid_moves:
@@ -191,13 +651,13 @@ class Board:
                 color = (255, 0, 0)  # Red (capture move)
 
             # Check for En Passant
-            if isinstance(selected_piece, Pawn) and self.is_en_passant(
+            if selected_piece.type_id == PAWN and self.is_en_passant(
                 selected_piece, current_pos, move, last_move
             ):
                 color = (255, 0, 0)  # Red for en passant capture
 
             # Check for Castling
-            if isinstance(selected_piece, King):
+            if selected_piece.type_id == KING:
                 if self.is_castle(selected_piece, current_pos, move):
                     color = (0, 0, 255)  # Blue for castling move
 
@@ -276,11 +736,15 @@ class Board:
             bool: True if en passant is legal, False otherwise.
         """
 
-        if isinstance(piece, Pawn) and last_move:
+        if piece.type_id == PAWN and last_move:
             last_piece, last_start, last_end = last_move
 
             # Last move must be a pawn moving 2 squares
-            if isinstance(last_piece, Pawn) and abs(last_start[0] - last_end[0]) == 2:
+            if (
+                last_piece is not None
+                and last_piece.type_id == PAWN
+                and abs(last_start[0] - last_end[0]) == 2
+            ):
                 # Must be in the same rank as the last pawn
                 if start[0] == last_end[0] and abs(start[1] - last_end[1]) == 1:
                     direction = -1 if piece.color == "w" else 1
@@ -315,14 +779,20 @@ class Board:
         end_row, end_col = end_pos
 
         if piece:
-            if isinstance(piece, King):  # Track king's position for check detection
+            # Moves memoized for the position being left will not be asked for again
+            self.legal_moves_cache.clear()
+            castling_key = self.castling_key()
+            captured = self.board[end_row][end_col]
+            if captured is not None:
+                self.pieces[captured.color].remove(captured)
+                self.toggle_piece(captured, end_row, end_col)
+
+            if piece.type_id == KING:  # Track king's position for check detection
                 if piece.color == "w":
                     self.white_king = (end_row, end_col)
                 else:
                     self.black_king = (end_row, end_col)
 
-                self.king_moved[piece.color] = True
-
                 # Handle castling move
                 castling_type = self.is_castle(piece, start_pos, end_pos)
                 if castling_type:
@@ -331,31 +801,37 @@ class Board:
 
                     # Move the rook
                     rook = self.board[start_row][rook_start_col]
-                    if isinstance(rook, Rook) and rook.color == piece.color:
+                    if (
+                        rook is not None
+                        and rook.type_id == ROOK
+                        and rook.color == piece.color
+                    ):
                         self.board[start_row][rook_start_col] = None
                         self.board[start_row][rook_end_col] = rook
                         rook.col = rook_end_col
-                    ""
-                    # Update piece's state
-                    self.king_moved[piece.color] = True
-                    self.rook_moved[f"{piece.color}_{castling_type}"] = True
+                        self.toggle_piece(rook, start_row, rook_start_col)
+                        self.toggle_piece(rook, start_row, rook_end_col)
 
-            if isinstance(piece, Rook):
-                self.rook_moved[
-                    f"{piece.color}_{'kingside' if piece.col >= 4 else 'queenside'}"
-                ] = True
+            # A king or rook leaving its home square, or a rook captured on it,
+            # loses the rights tied to that square
+            self.castling_rights &= ~(
+                CASTLING_SQUARES.get(start_pos, 0) | CASTLING_SQUARES.get(end_pos, 0)
+            )
 
             # En Passant Handling
-            if isinstance(piece, Pawn) and last_move:
+            if piece.type_id == PAWN and last_move:
                 _, _, last_move_end = last_move
 
                 if self.is_en_passant(piece, start_pos, end_pos, last_move):
+                    captured = self.board[last_move_end[0]][last_move_end[1]]
+                    self.pieces[captured.color].remove(captured)
+                    self.toggle_piece(captured, *last_move_end)
                     self.board[last_move_end[0]][
                         last_move_end[1]
                     ] = None  # Remove the captured pawn
 
             # **🔹 Pawn Promotion Handling**
-            if isinstance(piece, Pawn) and (end_row == 0 or end_row == 7):
+            if piece.type_id == PAWN and (end_row == 0 or end_row == 7):
                 if game is not None:
                     self.draw(game.screen)
                     promoted_piece = game.ask_promotion_choice(
@@ -369,6 +845,8 @@ class Board:
                     end_col
                 ] = promoted_piece  # Replace pawn with new piece
                 promoted_piece.row, promoted_piece.col = end_row, end_col
+                own_pieces = self.pieces[piece.color]
+                own_pieces[own_pieces.index(piece)] = promoted_piece
 
             else:
                 self.board[end_row][end_col] = piece
@@ -377,6 +855,183 @@ class Board:
             self.board[start_row][start_col] = None
             piece.row, piece.col = end_row, end_col
 
+            # Lift the mover off its start square and drop whatever now stands on
+            # the end square (the piece itself, or its promoted replacement)
+            self.toggle_piece(piece, start_row, start_col)
+            self.toggle_piece(self.board[end_row][end_col], end_row, end_col)
+
+            # Fold any castling rights lost by this move into the key
+            self.zobrist_key ^= castling_key ^ self.castling_key()
+
+    # --- Lightweight make/unmake for the AI search ---
+    def make_move(self, start: Tuple[int, int], end: Tuple[int, int]) -> dict:
+        """
+        Plays a move in place for the AI search, including castling, promotion (always
+        to a queen) and en passant, keeping the piece lists, Zobrist key, bitboards
+        and castling rights in sync. Returns info needed to undo the move.
+
+        Args:
+            start (Tuple[int,int]): Starting position (row, col).
+            end (Tuple[int,int]): Ending position (row, col).
+
+        Returns:
+            dict: Information needed to undo the move.
+        """
+        piece = self.board[start[0]][start[1]]
+        captured = self.board[end[0]][end[1]]
+        move_info = {
+            "piece": piece,
+            "start": start,
+            "end": end,
+            "captured": captured,
+            "king_pos": None,
+            "castling": None,
+            "en_passant": False,
+            "promotion": None,
+            "captured_index": None,
+            "zobrist_key": self.zobrist_key,
+            "bitboards": (self.bitboards["w"][:], self.bitboards["b"][:]),
+            "occupied": (self.occupied["w"], self.occupied["b"]),
+            "psqt": (self.psqt_midgame, self.psqt_endgame),
+            "castling_rights": self.castling_rights,
+        }
+
+        # --- Castling rights: lost once a king or rook leaves (or a rook is captured
+        # on) its home square ---
+        if start in CASTLING_SQUARES or end in CASTLING_SQUARES:
+            rights = self.castling_rights & ~(
+                CASTLING_SQUARES.get(start, 0) | CASTLING_SQUARES.get(end, 0)
+            )
+            self.zobrist_key ^= ZOBRIST_CASTLING[self.castling_rights]
+            self.zobrist_key ^= ZOBRIST_CASTLING[rights]
+            self.castling_rights = rights
+
+        # --- Handle castling ---
+        if piece.type_id == KING and abs(start[1] - end[1]) == 2:
+            move_info["castling"] = "kingside" if end[1] > start[1] else "queenside"
+            rook_start_col = 7 if end[1] > start[1] else 0
+            rook_end_col = start[1] + 1 if end[1] > start[1] else start[1] - 1
+            rook = self.board[start[0]][rook_start_col]
+            self.board[start[0]][rook_end_col] = rook
+            self.board[start[0]][rook_start_col] = None
+            rook.col = rook_end_col
+            self.toggle_piece(rook, start[0], rook_start_col)
+            self.toggle_piece(rook, start[0], rook_end_col)
+
+        # --- Handle en passant ---
+        elif piece.type_id == PAWN and captured is None and start[1] != end[1]:
+            move_info["en_passant"] = True
+            captured_piece = self.board[start[0]][end[1]]  # pawn being captured
+            move_info["captured"] = captured_piece
+            self.board[start[0]][end[1]] = None
+
+        # --- Remove the captured piece from its side's piece list, key and bitboards ---
+        if move_info["captured"] is not None:
+            captured = move_info["captured"]
+            enemy_pieces = self.pieces[captured.color]
+            index = enemy_pieces.index(captured)
+            del enemy_pieces[index]
+            move_info["captured_index"] = index
+            self.toggle_piece(captured, captured.row, captured.col)
+
+        # --- Move piece ---
+        self.board[end[0]][end[1]] = piece
+        self.board[start[0]][start[1]] = None
+        piece.row, piece.col = end
+
+        # --- Handle promotion ---
+        if piece.type_id == PAWN and (end[0] == 0 or end[0] == 7):
+            move_info["promotion"] = piece
+            # A pawn is on the board at most once, so its queen can be reused
+            queen = self.promotion_queens.get(piece)
+            if queen is None:
+                queen = self.promotion_queens[piece] = Queen(
+                    end[0], end[1], piece.color
+                )
+            else:
+                queen.row, queen.col = end
+            self.board[end[0]][end[1]] = queen
+            own_pieces = self.pieces[piece.color]
+            own_pieces[own_pieces.index(piece)] = queen
+            piece = queen
+
+        # --- Update key/bitboards: mover off its start square, result on the end ---
+        self.toggle_piece(move_info["piece"], start[0], start[1])
+        self.toggle_piece(piece, end[0], end[1])
+
+        # --- Update king position ---
+        if piece.type_id == KING:
+            move_info["king_pos"] = (
+                self.white_king if piece.color == "w" else self.black_king
+            )
+            if piece.color == "w":
+                self.white_king = end
+            else:
+                self.black_king = end
+
+        return move_info
+
+    def unmake_move(self, move_info: dict) -> None:
+        """
+        Undoes a move made by `make_move`, including castling, promotion, and en passant.
+
+        Args:
+            move_info (dict): Move info returned by `make_move`.
+        """
+        piece = move_info["piece"]
+        start, end = move_info["start"], move_info["end"]
+        captured = move_info["captured"]
+        self.zobrist_key = move_info["zobrist_key"]
+        self.bitboards["w"], self.bitboards["b"] = move_info["bitboards"]
+        self.occupied["w"], self.occupied["b"] = move_info["occupied"]
+        self.psqt_midgame, self.psqt_endgame = move_info["psqt"]
+        self.castling_rights = move_info["castling_rights"]
+
+        # --- Put the captured piece back into its side's piece list ---
+        if captured is not None:
+            self.pieces[captured.color].insert(move_info["captured_index"], captured)
+
+        # --- Undo promotion ---
+        if move_info["promotion"]:
+            own_pieces = self.pieces[piece.color]
+            own_pieces[own_pieces.index(self.board[end[0]][end[1]])] = move_info[
+                "promotion"
+            ]
+            self.board[end[0]][end[1]] = move_info["promotion"]
+            piece = move_info["promotion"]
+
+        # --- Undo castling ---
+        if move_info["castling"]:
+            rook_end_col = (
+                start[1] + 1 if move_info["castling"] == "kingside" else start[1] - 1
+            )
+            rook_start_col = 7 if move_info["castling"] == "kingside" else 0
+            rook = self.board[start[0]][rook_end_col]
+            self.board[start[0]][rook_end_col] = None
+            self.board[start[0]][rook_start_col] = rook
+            rook.col = rook_start_col
+
+        # --- Undo en passant ---
+        if move_info["en_passant"]:
+            # The captured pawn stood beside the moving pawn, on its start row
+            self.board[start[0]][end[1]] = captured
+            self.board[end[0]][end[1]] = None
+            self.board[start[0]][start[1]] = piece
+            piece.row, piece.col = start
+            return
+
+        # --- Normal undo ---
+        self.board[start[0]][start[1]] = piece
+        self.board[end[0]][end[1]] = captured
+        piece.row, piece.col = start
+
+        # --- Restore king position ---
+        if piece.type_id == KING:
+            if piece.color == "w":
+                self.white_king = move_info["king_pos"]
+            else:
+                self.black_king = move_info["king_pos"]
+
     def can_castle(self, color: str) -> Dict[str, bool]:
         """
         Checks whether castling is legal for the given color.
@@ -392,21 +1047,27 @@ class Board:
         king_col = 4
 
         castling_rights = {"kingside": False, "queenside": False}
-
-        # Ensure the king is in the correct position and has not moved
-        king = self.board[row][king_col]
-        if king is None or not isinstance(king, King) or self.king_moved[color]:
+        rights = CASTLING_RIGHTS[color]
+
+        back_rank = self.board[row]  # The only row read below
+
+        # Ensure the king is in the correct position and has not moved (moving it
+        # cleared both of its rights)
+        king = back_rank[king_col]
+        if (
+            king is None
+            or king.type_id != KING
+            or not self.castling_rights & (rights["kingside"] | rights["queenside"])
+        ):
             return castling_rights  # King has moved or is not in the correct position
 
         # Kingside Castling (King moves two squares to the right)
         rook_col = 7
-        if not self.rook_moved.get(f"{color}_kingside", True):
+        if self.castling_rights & rights["kingside"]:
             if (
-                self.board[row][rook_col] is not None
-                and isinstance(self.board[row][rook_col], Rook)
-                and all(
-                    self.board[row][col] is None for col in [5, 6]
-                )  # f, g must be empty
+                back_rank[rook_col] is not None
+                and back_rank[rook_col].type_id == ROOK
+                and all(back_rank[col] is None for col in [5, 6])  # f, g must be empty
                 and not any(
                     self.is_check(color, (row, col)) for col in [4, 5, 6]
                 )  # King can't pass through check
@@ -415,12 +1076,12 @@ class Board:
 
         # Queenside Castling (King moves two squares to the left)
         rook_col = 0
-        if not self.rook_moved.get(f"{color}_queenside", True):
+        if self.castling_rights & rights["queenside"]:
             if (
-                self.board[row][rook_col] is not None
-                and isinstance(self.board[row][rook_col], Rook)
+                back_rank[rook_col] is not None
+                and back_rank[rook_col].type_id == ROOK
                 and all(
-                    self.board[row][col] is None for col in [1, 2, 3]
+                    back_rank[col] is None for col in [1, 2, 3]
                 )  # b, c, d must be empty
                 and not any(
                     self.is_check(color, (row, col)) for col in [4, 3, 2]
@@ -445,7 +1106,7 @@ class Board:
             Optional[str]: 'kingside' if the move is kingside castling, 'queenside' if queenside castling,
                            or None if the move is not a castling move.
         """
-        if not isinstance(piece, King):  # Ensure it's a king
+        if piece.type_id != KING:  # Ensure it's a king
             return None
 
         start_row, start_col = start
@@ -480,94 +1141,40 @@ class Board:
             king_pos = self.white_king if color == "w" else self.black_king
             king_row, king_col = king_pos
 
-        opponent_color = "b" if color == "w" else "w"
-
-        # Define possible directions of attack
-        directions = [
-            (-1, 0),
-            (1, 0),
-            (0, -1),
-            (0, 1),  # Vertical & horizontal (Rook, Queen)
-            (-1, -1),
-            (-1, 1),
-            (1, -1),
-            (1, 1),  # Diagonal (Bishop, Queen)
-        ]
-
-        # 1️⃣ Check for Rook & Queen (straight-line attacks)
-        for drow, dcol in directions[:4]:  # First four are straight lines
-            r, c = king_row + drow, king_col + dcol
-            while 0 <= r < ROWS and 0 <= c < COLS:
-                piece = self.board[r][c]
-                if piece:
-                    if piece.color == opponent_color and isinstance(
-                        piece, (Rook, Queen)
-                    ):
+        enemy = self.bitboards["b" if color == "w" else "w"]
+        square = king_row * 8 + king_col
+
+        # 1️⃣ Pawns, knights and the opponent king: one AND with the attack masks
+        if (
+            PAWN_ATTACKS[color][square] & enemy[PAWN]
+            or KNIGHT_ATTACKS[square] & enemy[KNIGHT]
+            or KING_ATTACKS[square] & enemy[KING]
+        ):
+            return True  # King is in check
+
+        # 2️⃣ Sliders: on a ray holding an enemy slider, the piece nearest the king
+        # decides. Rays running to higher squares start at their lowest set bit
+        straight = enemy[ROOK] | enemy[QUEEN]
+        diagonal = enemy[BISHOP] | enemy[QUEEN]
+        occupied = None
+        bit = 1 << square
+        for rays, sliders in (
+            (ORTHOGONAL_RAY_MASKS[square], straight),
+            (DIAGONAL_RAY_MASKS[square], diagonal),
+        ):
+            if not sliders:
+                continue
+            for ray in rays:
+                if ray & sliders:
+                    if occupied is None:
+                        occupied = self.occupied["w"] | self.occupied["b"]
+                    blockers = ray & occupied
+                    if ray > bit:
+                        nearest = blockers & -blockers
+                    else:
+                        nearest = 1 << (blockers.bit_length() - 1)
+                    if nearest & sliders:
                         return True  # King is in check
-                    break  # Stop searching if a piece blocks
-                r += drow
-                c += dcol
-
-        # 2️⃣ Check for Bishop & Queen (diagonal attacks)
-        for drow, dcol in directions[4:]:  # Last four are diagonals
-            r, c = king_row + drow, king_col + dcol
-            while 0 <= r < ROWS and 0 <= c < COLS:
-                piece = self.board[r][c]
-                if piece:
-                    if piece.color == opponent_color and isinstance(
-                        piece, (Bishop, Queen)
-                    ):
-                        return True
-                    break
-                r += drow
-                c += dcol
-
-        # 3️⃣ Check for Knights
-        knight_moves = [
-            (-2, -1),
-            (-2, 1),
-            (2, -1),
-            (2, 1),
-            (-1, -2),
-            (-1, 2),
-            (1, -2),
-            (1, 2),
-        ]
-        for dr, dc in knight_moves:
-            r, c = king_row + dr, king_col + dc
-            if 0 <= r < ROWS and 0 <= c < COLS:
-                piece = self.board[r][c]
-                if (
-                    piece
-                    and piece.color == opponent_color
-                    and isinstance(piece, Knight)
-                ):
-                    return True  # King is in check
-
-        # 4️⃣ Check for Pawn Attacks
-        pawn_attack_rows = (
-            [-1, 1] if color == "w" else [1, -1]
-        )  # White pawns attack upwards, black downwards
-        for dr in pawn_attack_rows:
-            for dc in [-1, 1]:  # Pawns attack diagonally
-                r, c = king_row + dr, king_col + dc
-                if 0 <= r < ROWS and 0 <= c < COLS:
-                    piece = self.board[r][c]
-                    if (
-                        piece
-                        and piece.color == opponent_color
-                        and isinstance(piece, Pawn)
-                    ):
-                        return True  # King is in check
-
-        # 5️⃣ Check for Opponent King (Adjacent Squares)
-        king_moves = directions + [(1, 1), (-1, -1), (1, -1), (-1, 1)]
-        for dr, dc in king_moves:
-            r, c = king_row + dr, king_col + dc
-            if 0 <= r < ROWS and 0 <= c < COLS:
-                piece = self.board[r][c]
-                if piece and piece.color == opponent_color and isinstance(piece, King):
-                    return True  # King is in check
 
         return False  # No check detected
 
@@ -591,18 +1198,25 @@ class Board:
         else:
             self.black_king = new_pos
 
-        # Simulate moving the king
-        self.board[original_position[0]][original_position[1]] = None
-        self.board[new_pos[0]][new_pos[1]] = king
-        king.row, king.col = new_pos
+        # Simulate moving the king in the bitboards is_check reads; the board matrix
+        # and the piece itself are left alone
+        target_bit = 1 << (new_pos[0] * 8 + new_pos[1])
+        move_bits = 1 << (original_position[0] * 8 + original_position[1]) | target_bit
+        self.bitboards[king.color][KING] ^= move_bits
+        self.occupied[king.color] ^= move_bits
+        if captured_piece is not None:
+            self.bitboards[captured_piece.color][captured_piece.type_id] ^= target_bit
+            self.occupied[captured_piece.color] ^= target_bit
 
         # Check if the king is in check at the new position
         in_check = self.is_check(king.color)
 
         # Revert move
-        self.board[original_position[0]][original_position[1]] = king
-        self.board[new_pos[0]][new_pos[1]] = captured_piece
-        king.row, king.col = original_position
+        self.bitboards[king.color][KING] ^= move_bits
+        self.occupied[king.color] ^= move_bits
+        if captured_piece is not None:
+            self.bitboards[captured_piece.color][captured_piece.type_id] ^= target_bit
+            self.occupied[captured_piece.color] ^= target_bit
 
         # Restore the king's position after checking
         if king.color == "w":
@@ -625,17 +1239,8 @@ class Board:
         if not self.is_check(color):
             return False  # Can't be checkmate if not in check
 
-        # Loop over all pieces of the given color
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece and piece.color == color:
-                    if piece.valid_moves(
-                        self
-                    ):  # If the piece has ANY valid moves, no checkmate
-                        return False
-
-        return True  # No moves escape check, so it's checkmate
+        # If ANY move escapes check, no checkmate
+        return not self.has_legal_move(color)
 
     def is_stalemate(self, color: str) -> bool:
         """
@@ -650,14 +1255,93 @@ class Board:
         if self.is_check(color):
             return False  # Can't be stalemate if in check
 
-        # Loop over all pieces of the given color
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece and piece.color == color:
-                    if piece.valid_moves(
-                        self
-                    ):  # If the piece has ANY valid moves, no stalemate
-                        return False
+        # If ANY move is available, no stalemate
+        return not self.has_legal_move(color)
+
+    def has_legal_move(self, color: str) -> bool:
+        """
+        Determines if the given player has at least one legal move. Stops at the
+        first one generate_legal_moves yields.
+
+        Args:
+            color (str): The color of the player ('w' for white, 'b' for black).
+
+        Returns:
+            bool: True if some piece of that color can move, False otherwise.
+        """
+        return next(self.generate_legal_moves(color), None) is not None
+
+    def pinned_pieces(self, color: str) -> int:
+        """
+        Finds the pieces of a color pinned to their king: on a ray from the king,
+        the first piece is its own and the next one is an enemy slider moving along
+        that ray. Each ray costs one AND with the occupancy and two bit scans.
+
+        Args:
+            color (str): Color of the king.
+
+        Returns:
+            int: Bitboard of the pinned pieces (bit = row * 8 + col).
+        """
+        row, col = self.white_king if color == "w" else self.black_king
+        square = row * 8 + col
+        bit = 1 << square
+        enemy = self.bitboards["b" if color == "w" else "w"]
+        own = self.occupied[color]
+        occupied = own | self.occupied["b" if color == "w" else "w"]
+
+        pinned = 0
+        for rays, sliders in (
+            (ORTHOGONAL_RAY_MASKS[square], enemy[ROOK] | enemy[QUEEN]),
+            (DIAGONAL_RAY_MASKS[square], enemy[BISHOP] | enemy[QUEEN]),
+        ):
+            if not sliders:
+                continue
+            for ray in rays:
+                if not ray & sliders:
+                    continue
+                blockers = ray & occupied
+                # Rays running to higher squares meet their lowest set bit first
+                if ray > bit:
+                    first = blockers & -blockers
+                    blockers ^= first
+                    second = blockers & -blockers
+                else:
+                    first = 1 << (blockers.bit_length() - 1)
+                    blockers ^= first
+                    second = 1 << (blockers.bit_length() - 1) if blockers else 0
+                if first & own and second & sliders:
+                    pinned |= first
+        return pinned
+
+    def generate_legal_moves(
+        self, color: str
+    ) -> Iterator[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Lazily yields the legal moves of a color (en passant aside), piece by piece.
+
+        Outside of check only the king and the pinned pieces (see pinned_pieces)
+        can expose their king, so every other piece's pseudo-legal moves are legal
+        as they are; just those few pieces go through the per-move king safety
+        test. In check, every piece does.
+
+        Args:
+            color (str): The color of the player ('w' for white, 'b' for black).
 
-        return True  # No moves available, so it's stalemate
+        Yields:
+            Tuple[start, end]: The next legal move.
+        """
+        if self.is_check(color):
+            checked = ALL_SQUARES
+        else:
+            checked = self.pinned_pieces(color)
+
+        for piece in self.pieces[color]:
+            row, col = piece.row, piece.col
+            start = (row, col)
+            if piece.type_id == KING or checked >> (row * 8 + col) & 1:
+                destinations = piece.valid_moves(self)
+            else:
+                destinations = piece.pseudo_moves(self)
+            for dest in destinations:
+                yield start, dest
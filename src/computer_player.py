@@ -1,303 +1,378 @@
-from typing import Tuple, Optional, List
-
-from src.board import Board
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from operator import itemgetter
+from typing import Tuple, Optional, List, Iterator, Sequence
+
+from src.board import (
+    Board,
+    ALL_SQUARES,
+    ZOBRIST_BLACK_TO_MOVE,
+    ZOBRIST_CASTLING,
+    KNIGHT_SQUARES,
+    KING_SQUARES,
+    PAWN_ATTACK_SQUARES,
+    ORTHOGONAL_RAY_MASKS,
+    DIAGONAL_RAY_MASKS,
+    KNIGHT_ATTACKS,
+    KING_ATTACKS,
+    PAWN_ATTACKS,
+    SLIDER_LINES,
+)
 from src.pieces import (
-    King,
-    Pawn,
-    Rook,
-    Queen,
-    Bishop,
-    Knight,
-)  # import all piece classes used
+    PAWN,
+    KNIGHT,
+    BISHOP,
+    ROOK,
+    QUEEN,
+    KING,
+)  # piece type ids
+from src.piece_square_tables import PIECE_VALUES
+
+# Capture ordering score, indexed [victim type_id][attacker type_id]: most valuable
+# victim first, least valuable attacker breaking ties
+MVV_LVA = tuple(
+    tuple(10 * PIECE_VALUES[victim] - PIECE_VALUES[attacker] for attacker in range(6))
+    for victim in range(6)
+)
+# Ordering score of a non-capturing promotion, scored like winning the promotion gain
+PROMOTION_SCORE = 10 * (PIECE_VALUES[QUEEN] - PIECE_VALUES[PAWN])
+
+# Pawn structure masks over square = row * 8 + col (row 0 = black's back rank)
+FILE_MASKS = tuple(sum(1 << (row * 8 + col) for row in range(8)) for col in range(8))
+
+
+def is_endgame_material(white: List[int], black: List[int]) -> bool:
+    """
+    Endgame test on the two sides' piece bitboards (indexed by type_id), shared by
+    is_endgame and evaluate_board, which already has both lists at hand.
+    """
+    # Piece counts are popcounts of the bitboards: six per side, no dicts
+    white_queens = white[QUEEN].bit_count()
+    black_queens = black[QUEEN].bit_count()
+
+    if white_queens == 0 and black_queens == 0:
+        return True
+
+    white_material = (
+        white[KNIGHT].bit_count() * PIECE_VALUES[KNIGHT]
+        + white[BISHOP].bit_count() * PIECE_VALUES[BISHOP]
+        + white[ROOK].bit_count() * PIECE_VALUES[ROOK]
+    )
+    black_material = (
+        black[KNIGHT].bit_count() * PIECE_VALUES[KNIGHT]
+        + black[BISHOP].bit_count() * PIECE_VALUES[BISHOP]
+        + black[ROOK].bit_count() * PIECE_VALUES[ROOK]
+    )
+
+    if (white_queens == 1 and black_queens == 0 and white_material <= 800) or (
+        black_queens == 1 and white_queens == 0 and black_material <= 800
+    ):
+        return True
+
+    total_non_pawn = (
+        white_material + black_material + (white_queens + black_queens) * 900
+    )
+
+    return total_non_pawn <= 1400
+
+
+NOT_FILE_A = ALL_SQUARES ^ FILE_MASKS[0]
+NOT_FILE_H = ALL_SQUARES ^ FILE_MASKS[7]
+
+
+def passed_pawns(own_pawns: int, enemy_pawns: int, color: str) -> int:
+    """
+    Returns the pawns of `own_pawns` that no enemy pawn can stop: none stands ahead
+    of them on their file or an adjacent file.
+
+    The enemy pawns are smeared towards `color`'s side of the board (three shift-or
+    steps fill every square behind them) and widened by one file each way; own
+    pawns outside that span are passed.
+    """
+    if color == "w":
+        # White advances towards row 0: black pawns block everything on higher rows
+        span = (enemy_pawns << 8) & ALL_SQUARES
+        span |= (span << 8) & ALL_SQUARES
+        span |= (span << 16) & ALL_SQUARES
+        span |= (span << 32) & ALL_SQUARES
+    else:
+        span = enemy_pawns >> 8
+        span |= span >> 8
+        span |= span >> 16
+        span |= span >> 32
+    span |= ((span << 1) & NOT_FILE_A) | ((span >> 1) & NOT_FILE_H)
+    return own_pawns & ~span
+
+
+def pawn_files(pawns: int) -> int:
+    """
+    Folds a pawn bitboard onto its first row.
+
+    Args:
+        pawns (int): Pawn bitboard over square = row * 8 + col.
+
+    Returns:
+        int: 8-bit mask with bit `col` set when any pawn stands on file `col`.
+    """
+    pawns |= pawns >> 32
+    pawns |= pawns >> 16
+    pawns |= pawns >> 8
+    return pawns & 0xFF
+
+
+# Pawn structures whose scores are memoized; the pawns change far less often than
+# the pieces, so most evaluations hit this cache even after a new piece placement
+PAWN_CACHE_SIZE = 1 << 14
+
+
+@lru_cache(maxsize=PAWN_CACHE_SIZE)
+def pawn_structure(white_pawns: int, black_pawns: int) -> Tuple[int, int]:
+    """
+    Scores the pawn-only terms of the evaluation, from white's point of view.
+
+    Args:
+        white_pawns (int): White pawn bitboard.
+        black_pawns (int): Black pawn bitboard.
+
+    Returns:
+        Tuple[int, int]: Doubled/isolated pawn penalties and passed pawn bonuses
+            (the latter counts double in the endgame, which the caller decides).
+    """
+    structure = passed = 0
+    for color, own_pawns, enemy_pawns in (
+        ("w", white_pawns, black_pawns),
+        ("b", black_pawns, white_pawns),
+    ):
+        sign = 1 if color == "w" else -1
+
+        # --- Passed pawns: no enemy pawn ahead on the same or adjacent files ---
+        bb = passed_pawns(own_pawns, enemy_pawns, color)
+        while bb:
+            low_bit = bb & -bb
+            row = (low_bit.bit_length() - 1) >> 3
+            bb ^= low_bit
+            rank = row if color == "b" else 7 - row
+            passed += sign * 10 * (7 - rank)
+
+        # --- Pawn structure penalties, on the set of files holding pawns ---
+        files = pawn_files(own_pawns)
+        # Doubled: every pawn beyond the first on its file
+        structure -= sign * 20 * (own_pawns.bit_count() - files.bit_count())
+        # Isolated: files with pawns but none on either neighbouring file
+        isolated = files & ~((files << 1) | (files >> 1))
+        structure -= sign * 15 * isolated.bit_count()
+
+    return structure, passed
+
+
+def nearest_blockers(rays: Sequence[int], square: int, occupied: int) -> int:
+    """
+    Returns the first occupied square along each of the given rays from `square`.
+
+    Args:
+        rays (Sequence[int]): Ray bitboards starting next to `square`.
+        square (int): Origin square, row * 8 + col.
+        occupied (int): Bitboard of the occupied squares.
+
+    Returns:
+        int: Bitboard with at most one square per ray.
+    """
+    bit = 1 << square
+    nearest = 0
+    for ray in rays:
+        blockers = ray & occupied
+        if blockers:
+            # Rays running to higher squares meet their lowest set bit first
+            if ray > bit:
+                nearest |= blockers & -blockers
+            else:
+                nearest |= 1 << (blockers.bit_length() - 1)
+    return nearest
+
+
+# Deepest ply the main search keeps per-ply state (killer moves) for
+MAX_PLY = 64
+
+# Bound beyond every score, mates included: the full alpha-beta window is
+# (-INF, INF). An int, so window comparisons never mix ints and floats
+INF = 10**9
+
+# Ordering score of a killer move: below winning captures, above other quiet moves
+KILLER_SCORE = 50
+
+# History counter at which a quiet move's ordering score reaches half KILLER_SCORE
+HISTORY_SCALE = 256
+
+# Late move reductions: from this depth on, quiet moves after the first
+# LMR_FULL_DEPTH_MOVES ordered moves are first searched one ply shallower
+LMR_MIN_DEPTH = 3
+LMR_FULL_DEPTH_MOVES = 3
+
+# Null-move pruning: tried from this depth on, with the search after passing the
+# move reduced by NULL_MOVE_REDUCTION plies (so it never goes below depth 0)
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+
+# Side-to-move term XORed into the board's Zobrist key (pieces and castling
+# rights), per color
+SIDE_TO_MOVE_KEYS = {"w": 0, "b": ZOBRIST_BLACK_TO_MOVE}
+
+# Positions whose legal move lists are kept; the oldest entry is dropped first
+MOVE_CACHE_SIZE = 1 << 13
+
+# Positions whose evaluation is kept (white's point of view); oldest dropped first
+EVAL_CACHE_SIZE = 1 << 16
+
+# Transposition table slots (a power of two). Positions map to a bucket of two
+# slots: a depth-preferred one and an always-replaced one next to it
+TT_SIZE = 1 << 20
+TT_BUCKET_MASK = TT_SIZE - 2
+
+# Half-width of the aspiration window around the previous iteration's score
+ASPIRATION_WINDOW = 50
+
+# Quiescence delta pruning: a capture is skipped when even winning the victim plus
+# this margin cannot lift the static score up to alpha
+DELTA_MARGIN = 200
+
+# Transposition table bound flags: how a stored score relates to the true score
+EXACT, LOWER_BOUND, UPPER_BOUND = range(3)
+
+# With a time limit, negamax checks the clock once every this many nodes (a power
+# of two), and no new iteration starts after this fraction of the limit has passed
+TIME_CHECK_NODES = 1 << 10
+SOFT_TIME_FRACTION = 0.4
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time limit of get_best_move has passed, to
+    unwind the unfinished iteration.
+    """
+
+
+# Root moves of the deepest iteration are searched in forked worker processes,
+# which inherit the player and board; not available where fork is not (Windows)
+CAN_FORK = "fork" in multiprocessing.get_all_start_methods()
+
+# (player, board) of the root search in progress, inherited by forked workers
+_root_search = None
+
+
+def _search_root_move(
+    move: Tuple[Tuple[int, int], Tuple[int, int]], depth: int, alpha: int
+) -> int:
+    """
+    Searches one root move of the current root search, proving with a null window
+    that it is no better than `alpha` and re-searching fully when it is.
+
+    Args:
+        move (Tuple[start, end]): Root move to search.
+        depth (int): Depth of the root search.
+        alpha (int): Best root score found so far.
+
+    Returns:
+        int: Score of the move for the side to move at the root (exact when above
+            alpha, otherwise an upper bound).
+    """
+    player, board = _root_search
+    color = player.color
+    root_key = player.board_hash(board, color)
+    player.position_counts[root_key] = player.position_counts.get(root_key, 0) + 1
+
+    try:
+        move_info = board.make_move(move[0], move[1])
+        score = -player.negamax(
+            board, depth - 1, -alpha - 1, -alpha, player.opponent_color, 1
+        )[0]
+        if score > alpha:
+            score = -player.negamax(
+                board, depth - 1, -INF, -alpha, player.opponent_color, 1
+            )[0]
+        board.unmake_move(move_info)
+    finally:
+        player.position_counts[root_key] -= 1
+    return score
 
 
 class ComputerPlayer:
     """
     Computer chess player using Negamax (Negamax = Minimax in zero-sum symmetric form)
     with alpha-beta pruning, quiescence search, iterative deepening, transposition table,
-    PST-based evaluation and light-weight make/undo for the search.
+    PST-based evaluation and the board's in-place make/unmake for the search.
 
     Important behavior:
-      - Prefers faster mate (score = MATE_SCORE - depth).
+      - Prefers faster mate (score = MATE_SCORE - ply).
       - Applies a penalty to stalemate for side to move to avoid forcing stalemate when winning.
     """
 
     # scoring constants
     MATE_SCORE = 100000
+    MATE_BOUND = MATE_SCORE - 1000  # scores beyond +/- this are mates in some plies
     STALEMATE_PENALTY = 30000  # penalty applied to the side that stalemates (encourages avoiding stalemate)
 
-    # --- Class-level PSTs to avoid rebuilding each evaluation ---
-    piece_values = {"p": 100, "n": 320, "b": 330, "r": 500, "q": 900, "k": 20000}
-
-    # Piece-square tables
-    pawn_table = [
-        [0, 0, 0, 0, 0, 0, 0, 0],
-        [50, 50, 50, 50, 50, 50, 50, 50],
-        [10, 10, 20, 30, 30, 20, 10, 10],
-        [5, 5, 10, 25, 25, 10, 5, 5],
-        [0, 0, 0, 20, 20, 0, 0, 0],
-        [5, -5, -10, 0, 0, -10, -5, 5],
-        [5, 10, 10, -20, -20, 10, 10, 5],
-        [0, 0, 0, 0, 0, 0, 0, 0],
-    ]
-
-    knight_table = [
-        [-50, -40, -30, -30, -30, -30, -40, -50],
-        [-40, -20, 0, 0, 0, 0, -20, -40],
-        [-30, 0, 10, 15, 15, 10, 0, -30],
-        [-30, 5, 15, 20, 20, 15, 5, -30],
-        [-30, 0, 15, 20, 20, 15, 0, -30],
-        [-30, 5, 10, 15, 15, 10, 5, -30],
-        [-40, -20, 0, 5, 5, 0, -20, -40],
-        [-50, -40, -30, -30, -30, -30, -40, -50],
-    ]
-
-    bishop_table = [
-        [-20, -10, -10, -10, -10, -10, -10, -20],
-        [-10, 5, 0, 0, 0, 0, 5, -10],
-        [-10, 10, 10, 10, 10, 10, 10, -10],
-        [-10, 0, 10, 10, 10, 10, 0, -10],
-        [-10, 5, 5, 10, 10, 5, 5, -10],
-        [-10, 0, 5, 10, 10, 5, 0, -10],
-        [-10, 0, 0, 0, 0, 0, 0, -10],
-        [-20, -10, -10, -10, -10, -10, -10, -20],
-    ]
-
-    rook_table = [
-        [0, 0, 0, 5, 5, 0, 0, 0],
-        [-5, 0, 0, 0, 0, 0, 0, -5],
-        [-5, 0, 0, 0, 0, 0, 0, -5],
-        [-5, 0, 0, 0, 0, 0, 0, -5],
-        [-5, 0, 0, 0, 0, 0, 0, -5],
-        [-5, 0, 0, 0, 0, 0, 0, -5],
-        [5, 10, 10, 10, 10, 10, 10, 5],
-        [0, 0, 0, 0, 0, 0, 0, 0],
-    ]
-
-    queen_table = [
-        [-20, -10, -10, -5, -5, -10, -10, -20],
-        [-10, 0, 5, 0, 0, 0, 0, -10],
-        [-10, 5, 5, 5, 5, 5, 0, -10],
-        [0, 0, 5, 5, 5, 5, 0, -5],
-        [-5, 0, 5, 5, 5, 5, 0, -5],
-        [-10, 0, 5, 5, 5, 5, 0, -10],
-        [-10, 0, 0, 0, 0, 0, 0, -10],
-        [-20, -10, -10, -5, -5, -10, -10, -20],
-    ]
-
-    king_midgame_table = [
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-20, -30, -30, -40, -40, -30, -30, -20],
-        [-10, -20, -20, -20, -20, -20, -20, -10],
-        [20, 20, 0, 0, 0, 0, 20, 20],
-        [20, 30, 10, 0, 0, 10, 30, 20],
-    ]
-
-    king_endgame_table = [
-        [-50, -40, -30, -20, -20, -30, -40, -50],
-        [-40, -20, -10, 0, 0, -10, -20, -40],
-        [-30, -10, 20, 30, 30, 20, -10, -30],
-        [-20, 0, 30, 40, 40, 30, 0, -20],
-        [-20, 0, 30, 40, 40, 30, 0, -20],
-        [-30, -10, 20, 30, 30, 20, -10, -30],
-        [-40, -20, -10, 0, 0, -10, -20, -40],
-        [-50, -40, -30, -20, -20, -30, -40, -50],
-    ]
-
-    def __init__(self, color: str) -> None:
+    def __init__(self, color: str, workers: Optional[int] = None) -> None:
         """
         Initializes the computer player with the given color and creates an empty transposition table.
 
         Args:
             color (str): The player's color ("w" for white, "b" for black).
+            workers (Optional[int]): Processes searching root moves in parallel
+                (opt-in, worth it only with several idle cores); defaults to 1, which
+                keeps the search in this process.
         """
 
         self.color = color
+        self.workers = workers or 1
         self.opponent_color = "w" if color == "b" else "b"
-        self.transposition_table = {}  # Stores evaluated board states
+        # Fixed-size table of (key, depth, flag, score, best_move, age) entries; age
+        # is the search that stored the entry, so older entries are replaced first
+        self.transposition_table = [None] * TT_SIZE
+        self.tt_age = 0
 
         # --- Position repetition tracking ---
         self.position_counts = {}  # key: position key, value: occurrence count
 
-    def board_hash(self, board: Board) -> int:
-        """
-        Generates a hash for the current board state.
-
-        This implementation converts the board's 2D list into a string representation,
-        replacing empty squares with "-", and then hashes that string.
+        # Legal moves per position key, reused when a position recurs in the tree
+        # (insertion-ordered, so the first key is the oldest)
+        self.move_cache = {}
 
-        Args:
-            board (Board): The current board state.
-
-        Returns:
-            int: A hash value representing the board state.
-        """
-        board_str = "".join(
-            "".join(piece.piece_type if piece is not None else "-" for piece in row)
-            for row in board.board
-        )
-        return hash(board_str)
-
-    def get_position_key(self, board: Board, turn: str) -> str:
-        # Piece placement
-        board_str = ""
-        for row in board.board:
-            for piece in row:
-                if piece:
-                    board_str += piece.color + piece.piece_type
-                else:
-                    board_str += "--"
-
-        # Castling rights (assumes board.rook_moved is a dict like {"w_kingside": False, ...})
-        castling_str = "".join([k for k, v in board.rook_moved.items() if not v]) or "-"
-
-        # En passant (only if a pawn can actually capture it)
-        en_passant_str = "-"
-        if getattr(board, "move_history", None):
-            last_move = board.move_history[-1]
-            if last_move["piece"].piece_type == "p":
-                start_row, start_col = last_move["start"]
-                end_row, end_col = last_move["end"]
-                if abs(start_row - end_row) == 2:
-                    ep_row = (start_row + end_row) // 2
-                    ep_col = start_col
-                    for dc in [-1, 1]:
-                        adj_col = ep_col + dc
-                        if 0 <= adj_col < 8:
-                            adj_piece = board.board[ep_row][adj_col]
-                            if (
-                                adj_piece
-                                and adj_piece.color != last_move["piece"].color
-                                and adj_piece.piece_type == "p"
-                            ):
-                                en_passant_str = f"{ep_row}{ep_col}"
-                                break
-
-        return f"{board_str}_{turn}_{castling_str}_{en_passant_str}"
-
-    # --- Lightweight move/undo for AI search ---
-    def make_move_light(
-        self, board: Board, start: Tuple[int, int], end: Tuple[int, int]
-    ) -> dict:
-        """
-        Performs a lightweight move for AI search, including castling, promotion, and en passant.
-        Returns info needed to undo the move.
+        # Static evaluation per piece placement key (the Zobrist key without its
+        # castling term), bounded by EVAL_CACHE_SIZE
+        self.eval_cache = {}
 
-        Args:
-            board (Board): Board to operate on.
-            start (Tuple[int,int]): Starting position (row, col).
-            end (Tuple[int,int]): Ending position (row, col).
+        # Two quiet moves per ply that recently caused a beta cutoff
+        self.killer_moves = [[None, None] for _ in range(MAX_PLY)]
 
-        Returns:
-            dict: Information needed to undo the move.
-        """
-        piece = board.board[start[0]][start[1]]
-        captured = board.board[end[0]][end[1]]
-        move_info = {
-            "piece": piece,
-            "start": start,
-            "end": end,
-            "captured": captured,
-            "king_pos": None,
-            "castling": None,
-            "en_passant": False,
-            "promotion": None,
-        }
+        # Per color: quiet move -> sum of depth^2 over the cutoffs it caused
+        self.history = {"w": {}, "b": {}}
 
-        # --- Handle castling ---
-        if isinstance(piece, King) and abs(start[1] - end[1]) == 2:
-            move_info["castling"] = "kingside" if end[1] > start[1] else "queenside"
-            rook_start_col = 7 if end[1] > start[1] else 0
-            rook_end_col = start[1] + 1 if end[1] > start[1] else start[1] - 1
-            rook = board.board[start[0]][rook_start_col]
-            board.board[start[0]][rook_end_col] = rook
-            board.board[start[0]][rook_start_col] = None
-            rook.col = rook_end_col
-
-        # --- Handle en passant ---
-        elif isinstance(piece, Pawn) and captured is None and start[1] != end[1]:
-            move_info["en_passant"] = True
-            captured_row = start[0] if piece.color == "w" else start[0]
-            captured_piece = board.board[start[0]][end[1]]  # pawn being captured
-            move_info["captured"] = captured_piece
-            board.board[start[0]][end[1]] = None
-
-        # --- Move piece ---
-        board.board[end[0]][end[1]] = piece
-        board.board[start[0]][start[1]] = None
-        piece.row, piece.col = end
-
-        # --- Handle promotion ---
-        if isinstance(piece, Pawn) and (end[0] == 0 or end[0] == 7):
-            move_info["promotion"] = piece
-            board.board[end[0]][end[1]] = Queen(
-                end[0], end[1], piece.color
-            )  # or a Queen
-            piece = board.board[end[0]][end[1]]
-
-        # --- Update king position ---
-        if isinstance(piece, King):
-            move_info["king_pos"] = (
-                board.white_king if piece.color == "w" else board.black_king
-            )
-            if piece.color == "w":
-                board.white_king = end
-            else:
-                board.black_king = end
+        # Reusable board the search runs on, so the game board is never mutated
+        self.search_board = Board.blank()
 
-        return move_info
+        # Clock deadline of the search in progress (None: no time limit) and the
+        # number of negamax nodes visited since it was set
+        self.deadline = None
+        self.nodes = 0
 
-    def undo_move_light(self, board: Board, move_info: dict):
+    def board_hash(self, board: Board, turn: str = "w") -> int:
         """
-        Undoes a move made by `make_move_light`, including castling, promotion, and en passant.
+        Returns the Zobrist key of the current position.
 
-        Args:
-            board (Board): Board to operate on.
-            move_info (dict): Move info returned by `make_move_light`.
-        """
-        piece = move_info["piece"]
-        start, end = move_info["start"], move_info["end"]
-        captured = move_info["captured"]
-
-        # --- Undo promotion ---
-        if move_info["promotion"]:
-            board.board[end[0]][end[1]] = move_info["promotion"]
-            piece = move_info["promotion"]
-
-        # --- Undo castling ---
-        if move_info["castling"]:
-            rook_end_col = (
-                start[1] + 1 if move_info["castling"] == "kingside" else start[1] - 1
-            )
-            rook_start_col = 7 if move_info["castling"] == "kingside" else 0
-            rook = board.board[start[0]][rook_end_col]
-            board.board[start[0]][rook_end_col] = None
-            board.board[start[0]][rook_start_col] = rook
-            rook.col = rook_start_col
-
-        # --- Undo en passant ---
-        if move_info["en_passant"]:
-            captured_row = start[0] - 1 if piece.color == "w" else start[0] + 1
-            board.board[captured_row][end[1]] = captured
-            board.board[end[0]][end[1]] = None
-            board.board[start[0]][start[1]] = piece
-            piece.row, piece.col = start
-            return
+        The key of the pieces and castling rights is maintained incrementally by the
+        board; the side to move is folded in here.
 
-        # --- Normal undo ---
-        board.board[start[0]][start[1]] = piece
-        board.board[end[0]][end[1]] = captured
-        piece.row, piece.col = start
+        Args:
+            board (Board): The current board state.
+            turn (str): Side to move ("w" or "b").
 
-        # --- Restore king position ---
-        if isinstance(piece, King):
-            if piece.color == "w":
-                board.white_king = move_info["king_pos"]
-            else:
-                board.black_king = move_info["king_pos"]
+        Returns:
+            int: A 64-bit key representing the position.
+        """
+        return board.zobrist_key ^ SIDE_TO_MOVE_KEYS[turn]
 
     # --- Evaluation functions ---
     def is_endgame(self, board: Board) -> bool:
@@ -310,41 +385,10 @@ class ComputerPlayer:
         Returns:
             bool: True if endgame, False otherwise.
         """
-        queens = {"w": 0, "b": 0}
-        non_pawn_material = {"w": 0, "b": 0}
-
-        for row in board.board:
-            for piece in row:
-                if not piece:
-                    continue
-
-                if piece.piece_type == "q":
-                    queens[piece.color] += 1
-
-                elif piece.piece_type not in ("p", "k"):
-                    non_pawn_material[piece.color] += self.piece_values[
-                        piece.piece_type
-                    ]
-
-        if queens["w"] == 0 and queens["b"] == 0:
-            return True
-
-        if (
-            queens["w"] == 1 and queens["b"] == 0 and non_pawn_material["w"] <= 800
-        ) or (queens["b"] == 1 and queens["w"] == 0 and non_pawn_material["b"] <= 800):
-            return True
-
-        total_non_pawn = (
-            non_pawn_material["w"]
-            + non_pawn_material["b"]
-            + queens["w"] * 900
-            + queens["b"] * 900
-        )
-
-        return total_non_pawn <= 1400
+        return is_endgame_material(board.bitboards["w"], board.bitboards["b"])
 
     # --- Evaluate board ---
-    def evaluate_board(self, board: Board) -> int:
+    def evaluate_board(self, board: Board, color: Optional[str] = None) -> int:
         """
         Evaluates the board using:
         - Material
@@ -354,191 +398,179 @@ class ComputerPlayer:
         - Bishop pair bonus
         - Rook open/semi-open file bonus
 
+        Args:
+            board (Board): Current board.
+            color (Optional[str]): Side whose point of view the score is given from
+                (the side to move in negamax). Defaults to the AI's color.
+
         Returns:
-            int: A positive score favors AI, negative favors opponent.
-        """
-        endgame = self.is_endgame(board)
-
-        # Piece-square tables
-        pst = {
-            "p": self.pawn_table,
-            "n": self.knight_table,
-            "b": self.bishop_table,
-            "r": self.rook_table,
-            "q": self.queen_table,
-            "k": self.king_endgame_table if endgame else self.king_midgame_table,
-        }
+            int: A positive score favors `color`, negative favors its opponent.
+        """
+        own_color = self.color if color is None else color
+
+        # The score depends on piece placement only: the castling term is taken
+        # out of the Zobrist key, so the same placement with other rights hits too
+        cache = self.eval_cache
+        key = board.zobrist_key ^ ZOBRIST_CASTLING[board.castling_rights]
+        score = cache.get(key)
+        if score is None:
+            bitboards = board.bitboards
+            endgame = is_endgame_material(bitboards["w"], bitboards["b"])
+
+            # Material + piece-square tables: the board keeps this sum (white minus
+            # black) up to date on every move, so no per-piece loop is needed here
+            score = board.psqt_endgame if endgame else board.psqt_midgame
+
+            # Pawn-only terms, memoized on the two pawn bitboards
+            structure, passed = pawn_structure(
+                bitboards["w"][PAWN], bitboards["b"][PAWN]
+            )
+            score += structure + (2 * passed if endgame else passed)
 
-        score = 0
-        pawn_columns = {"w": [0] * 8, "b": [0] * 8}
-        bishop_count = {"w": 0, "b": 0}
+            for color in ("w", "b"):
+                boards = bitboards[color]
+                own_pawns = boards[PAWN]
+                enemy_pawns = bitboards["b" if color == "w" else "w"][PAWN]
+                side_score = 0
 
-        # --- Single pass over the board ---
-        for row in range(8):
-            for col in range(8):
-                piece = board.board[row][col]
-                if not piece:
-                    continue
+                # --- Bishop pair bonus ---
+                if boards[BISHOP].bit_count() >= 2:
+                    side_score += 40
 
-                base_value = self.piece_values[piece.piece_type]
-                pst_bonus = (
-                    pst[piece.piece_type][row][col]
-                    if piece.color == "w"
-                    else pst[piece.piece_type][7 - row][col]
-                )
+                # --- Rook on a file without own pawns: open (no pawns) or semi-open ---
+                rooks = boards[ROOK]
+                while rooks:
+                    low_bit = rooks & -rooks
+                    rooks ^= low_bit
+                    file_mask = FILE_MASKS[(low_bit.bit_length() - 1) & 7]
+                    if not own_pawns & file_mask:
+                        side_score += 15 if enemy_pawns & file_mask else 25
 
-                if piece.color == self.color:
-                    score += base_value + pst_bonus
-                else:
-                    score -= base_value + pst_bonus
-
-                # --- Pawn tracking for structure and passed pawns ---
-                if piece.piece_type == "p":
-                    pawn_columns[piece.color][col] += 1
-
-                    # Passed pawn check (early exit once blocked)
-                    direction = -1 if piece.color == "w" else 1
-                    passed = True
-                    for adj_col in [col - 1, col, col + 1]:
-                        if 0 <= adj_col < 8:
-                            r = row + direction
-                            while 0 <= r < 8:
-                                enemy = board.board[r][adj_col]
-                                if (
-                                    enemy
-                                    and enemy.piece_type == "p"
-                                    and enemy.color != piece.color
-                                ):
-                                    passed = False
-                                    break  # blocked
-                                r += direction
-                        if not passed:
-                            break
-                    if passed:
-                        rank = row if piece.color == "b" else 7 - row
-                        bonus = 10 * (7 - rank)
-                        if endgame:
-                            bonus *= 2
-                        score += bonus if piece.color == self.color else -bonus
-
-                    # Isolated/doubled pawns will be calculated later
-
-                elif piece.piece_type == "b":
-                    bishop_count[piece.color] += 1
-
-                elif piece.piece_type == "r":
-                    # --- Inline rook file bonuses ---
-                    has_white_pawn = pawn_columns["w"][col] > 0
-                    has_black_pawn = pawn_columns["b"][col] > 0
-                    bonus = 0
-                    if piece.color == "w":
-                        if not has_white_pawn and not has_black_pawn:
-                            bonus = 25
-                        elif not has_white_pawn:
-                            bonus = 15
-                    else:
-                        if not has_black_pawn and not has_white_pawn:
-                            bonus = 25
-                        elif not has_black_pawn:
-                            bonus = 15
-                    score += bonus if piece.color == self.color else -bonus
-
-        # --- Pawn structure penalties ---
-        for color in ["w", "b"]:
-            penalty = 0
-            for col in range(8):
-                if pawn_columns[color][col] > 1:
-                    penalty += 20 * (pawn_columns[color][col] - 1)  # doubled
-                if pawn_columns[color][col] > 0:
-                    if (col == 0 or pawn_columns[color][col - 1] == 0) and (
-                        col == 7 or pawn_columns[color][col + 1] == 0
-                    ):
-                        penalty += 15  # isolated
-            score += -penalty if color == self.color else penalty
-
-        # --- Bishop pair bonus ---
-        for color in ["w", "b"]:
-            if bishop_count[color] >= 2:
-                score += 40 if color == self.color else -40
-
-        return score
+                score += side_score if color == "w" else -side_score
+
+            if len(cache) >= EVAL_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            cache[key] = score
+
+        return score if own_color == "w" else -score
 
     def quiescence(
-        self, board: Board, alpha: float, beta: float, color: str, depth: int = 0
+        self, board: Board, alpha: int, beta: int, color: str, ply: int = 0
     ) -> int:
         """
         Performs quiescence search to reduce horizon effect.
 
+        Only captures and promotions are searched (with delta pruning and losing
+        captures skipped), except when the side to move is in check, where every
+        evasion is tried.
+
         Args:
             board (Board): Current board.
-            alpha (float): Alpha value for pruning.
-            beta (float): Beta value for pruning.
+            alpha (int): Alpha value for pruning.
+            beta (int): Beta value for pruning.
             color (str): Color to move.
-            depth (int): Current depth in quiescence search.
+            ply (int): Distance from the root of the search, used for mate scores.
 
         Returns:
-            int: Evaluated score.
+            int: Evaluated score, from the perspective of the side to move.
         """
-        stand_pat = self.evaluate_board(board)
-        if color != self.color:
-            stand_pat = -stand_pat
+        # Hot callables bound to locals once per node (skips attribute lookups per move)
+        make_move = board.make_move
+        unmake_move = board.unmake_move
+        is_check = board.is_check
+        quiescence = self.quiescence
+        opponent = "b" if color == "w" else "w"
+
+        # --- In check: standing pat is not an option, every evasion is searched ---
+        if is_check(color):
+            moves = self.get_all_moves(board, color)
+            if not moves:
+                # side to move is checkmated -> huge negative (from perspective of side to move)
+                return -self.MATE_SCORE + ply
 
-        if stand_pat >= beta:
-            return beta
+            best_score = -INF
+            for move in moves:
+                move_info = make_move(move[0], move[1])
+                score = -quiescence(board, -beta, -alpha, opponent, ply + 1)
+                unmake_move(move_info)
 
-        if alpha < stand_pat:
-            alpha = stand_pat
+                if score >= beta:
+                    return score
+                if score > best_score:
+                    best_score = score
+                    alpha = max(alpha, score)
+            return best_score
 
-        # Generate captures + checks
-        moves = self.get_all_moves(board, color)
+        stand_pat = self.evaluate_board(board, color)
 
-        if not moves:
-            # No legal moves -> mate or stalemate
-            if board.is_check(color):
-                # side to move is checkmated -> huge negative (from perspective of side to move)
-                return -self.MATE_SCORE + depth
-            else:
-                # stalemate -> draw
-                return 0
+        # Fail-soft: return the best score found, even when outside [alpha, beta]
+        if stand_pat >= beta:
+            return stand_pat
 
-        capture_or_check_moves = []
+        # Delta pruning: not even winning a queen (and promoting) gets back to alpha
+        if stand_pat + 2 * PIECE_VALUES[QUEEN] + DELTA_MARGIN < alpha:
+            return stand_pat
 
-        for move in moves:
-            target_piece = board.board[move[1][0]][move[1][1]]
+        best_score = stand_pat
+        if alpha < stand_pat:
+            alpha = stand_pat
 
-            if target_piece is not None:
-                capture_or_check_moves.append(move)
+        # Captures and promotions only, most valuable victim / least valuable
+        # attacker first
+        squares = board.board
+        pinned = board.pinned_pieces(color)
+        endgame = None
+        for move in self.generate_captures(board, color):
+            start, end = move
+            piece = squares[start[0]][start[1]]
+            target = squares[end[0]][end[1]]
+            gain = PIECE_VALUES[target.type_id] if target is not None else 0
+            if piece.type_id == PAWN and (end[0] == 0 or end[0] == 7):
+                gain += PIECE_VALUES[QUEEN] - PIECE_VALUES[PAWN]
+
+            # Delta pruning: this capture cannot raise the score up to alpha. Not
+            # in the endgame, where the evaluation swings more than the margin
+            if stand_pat + gain + DELTA_MARGIN < alpha:
+                if endgame is None:
+                    endgame = is_endgame_material(
+                        board.bitboards["w"], board.bitboards["b"]
+                    )
+                if not endgame:
+                    continue
 
-            else:
-                # If the move results in a check, include it
-                move_info = self.make_move_light(board, move[0], move[1])
-                is_check = board.is_check("b" if color == "w" else "w")
-                self.undo_move_light(board, move_info)
-                if is_check:
-                    capture_or_check_moves.append(move)
-
-        # Search them
-        for move in capture_or_check_moves:
-            move_info = self.make_move_light(board, move[0], move[1])
-            score = -self.quiescence(
-                board, -beta, -alpha, "b" if color == "w" else "w", depth + 1
-            )
-            self.undo_move_light(board, move_info)
+            # Skip captures that lose material once all recaptures are played
+            if PIECE_VALUES[piece.type_id] > gain and self.see(board, start, end) < 0:
+                continue
+
+            move_info = make_move(start, end)
+            # Pseudo-legal generation: drop captures that leave the own king in check.
+            # Not in check here, so only a king move or a pinned piece can
+            if (
+                piece.type_id == KING or pinned >> (start[0] * 8 + start[1]) & 1
+            ) and is_check(color):
+                unmake_move(move_info)
+                continue
+            score = -quiescence(board, -beta, -alpha, opponent, ply + 1)
+            unmake_move(move_info)
 
             if score >= beta:
-                return beta
+                return score
 
-            alpha = max(alpha, score)
+            if score > best_score:
+                best_score = score
+                alpha = max(alpha, score)
 
-        return alpha
+        return best_score
 
     def negamax(
         self,
         board: Board,
         depth: int,
-        alpha: float,
-        beta: float,
+        alpha: int,
+        beta: int,
         color: str,
+        ply: int = 0,
+        allow_null: bool = True,
     ) -> Tuple[int, Optional[Tuple[Tuple[int, int], Tuple[int, int]]]]:
         """
         Negamax search with alpha-beta pruning, repetition handling, and transposition table.
@@ -550,9 +582,12 @@ class ComputerPlayer:
         Args:
             board (Board): The current board state.
             depth (int): Remaining depth to search.
-            alpha (float): Alpha bound for alpha-beta pruning (lower bound).
-            beta (float): Beta bound for alpha-beta pruning (upper bound).
+            alpha (int): Alpha bound for alpha-beta pruning (lower bound).
+            beta (int): Beta bound for alpha-beta pruning (upper bound).
             color (str): Side to move ("w" or "b").
+            ply (int): Distance from the root, used to score mates by their distance.
+            allow_null (bool): Whether null-move pruning may be tried at this node
+                (False right after a null move, so two never follow each other).
 
         Returns:
             Tuple[int, Optional[Tuple[start, end]]]:
@@ -568,22 +603,44 @@ class ComputerPlayer:
                 unless there is no better option.
 
             - **Transposition table (TT):**
-                - Uses a hash of the board position for caching evaluations.
-                - If the position is already evaluated, returns the stored score/move
-                adjusted for any repetition penalty.
+                - Uses the Zobrist key of the position (incl. side to move) for
+                caching evaluations.
+                - If the position was already searched at least as deep and the stored
+                score is exact, returns the stored score/move adjusted for any
+                repetition penalty (scores are stored without it).
+                - A deep enough lower/upper bound raises alpha/lowers beta, and
+                cuts off immediately if the window closes.
+                - Otherwise the stored best move (e.g. from the previous iterative
+                deepening iteration) is searched first.
+
+            - **Principal variation search (PVS):**
+                - The first move is searched with the full window, the others with a
+                null window and re-searched only if they might beat alpha.
+
+            - **Null-move pruning:**
+                - From depth 3, when not in check, holding more than pawns and
+                statically at or above beta, the side to move passes; if a reduced null-window search still reaches
+                beta, the node is cut off without searching any move.
+
+            - **Late move reductions (LMR):**
+                - From depth 3, quiet moves ordered after the first three (not killers
+                or moves with a high history score, not giving or escaping check)
+                are searched one ply shallower first;
+                only those beating alpha are searched to full depth.
 
             - **Terminal conditions:**
                 - Depth == 0 → fall back to quiescence search for tactical stability.
                 - No legal moves:
-                    - If in check → checkmate (score = -MATE_SCORE + depth).
+                    - If in check → checkmate (score = -MATE_SCORE + ply).
                     - Else → stalemate (score = -STALEMATE_PENALTY).
 
             - **Alpha-beta pruning:**
                 - Cuts off branches when `alpha >= beta` to improve efficiency.
 
             - **Mate scoring:**
-                - Checkmate is scored as `-MATE_SCORE + depth` (the sooner the mate,
-                the higher the score for the mating side).
+                - Checkmate is scored as `-MATE_SCORE + ply`, where ply is the distance
+                from the root (the sooner the mate, the higher the score for the
+                mating side).
                 - This ensures the engine prefers faster mates and delays being mated.
 
             - **Repetition penalty application:**
@@ -591,16 +648,23 @@ class ComputerPlayer:
                 - Soft discouragement avoids draw loops unless forced.
 
         """
-        # --- Generate position key ---
-        pos_key = self.get_position_key(board, color)
-        self.position_counts[pos_key] = self.position_counts.get(pos_key, 0) + 1
-
-        repeat_count = self.position_counts[pos_key]
+        # --- Time limit: abandon the iteration once the deadline has passed ---
+        if self.deadline is not None:
+            self.nodes += 1
+            if not self.nodes & (TIME_CHECK_NODES - 1) and (
+                time.monotonic() > self.deadline
+            ):
+                raise SearchTimeout
+
+        # --- Generate position key (Zobrist: pieces + side to move) ---
+        # board_hash inlined: no method call on the hottest path
+        board_key = board.zobrist_key ^ SIDE_TO_MOVE_KEYS[color]
+        position_counts = self.position_counts
+        repeat_count = position_counts.get(board_key, 0) + 1
 
         # --- Handle repetition explicitly ---
         if repeat_count >= 3:
             # Threefold repetition = draw → treat as stalemate
-            self.position_counts[pos_key] -= 1
             return -self.STALEMATE_PENALTY, None
 
         elif repeat_count == 2:
@@ -610,127 +674,738 @@ class ComputerPlayer:
         else:
             repetition_penalty = 0
 
-        # --- Transposition table ---
-        board_key = hash(
-            str([[p.piece_type if p else "-" for p in r] for r in board.board])
-        )
-        if board_key in self.transposition_table:
-            self.position_counts[pos_key] -= 1
-            stored_eval, stored_move = self.transposition_table[board_key]
-            return stored_eval - repetition_penalty, stored_move
-
-        # --- Depth 0: quiescence search ---
-        if depth == 0:
-            score = self.quiescence(board, alpha, beta, color) - repetition_penalty
-            self.transposition_table[board_key] = (score, None)
-            self.position_counts[pos_key] -= 1
-            return score, None
-
-        # --- Generate moves ---
-        moves = self.get_all_moves(board, color)
-        if not moves:
-            if board.is_check(color):
-                score = -self.MATE_SCORE + depth
-            else:
-                score = -self.STALEMATE_PENALTY
-            self.transposition_table[board_key] = (score, None)
-            self.position_counts[pos_key] -= 1
-            return score, None
+        # Push the position for the nodes below it; popped on every exit
+        position_counts[board_key] = repeat_count
+        try:
+            # --- Transposition table ---
+            alpha_orig = alpha
+            tt_move = None
+            # probe_tt inlined: this lookup runs at every node
+            index = board_key & TT_BUCKET_MASK
+            entry = self.transposition_table[index]
+            if entry is None or entry[0] != board_key:
+                entry = self.transposition_table[index + 1]
+                if entry is not None and entry[0] != board_key:
+                    entry = None
+            if entry is not None:
+                _, stored_depth, stored_flag, stored_eval, stored_move, _ = entry
+                # Mate scores are stored relative to the storing node: rebase to ply
+                if stored_eval > self.MATE_BOUND:
+                    stored_eval -= ply
+                elif stored_eval < -self.MATE_BOUND:
+                    stored_eval += ply
+                if stored_depth >= depth:
+                    # Stored scores exclude the repetition penalty of the storing path
+                    if stored_flag == EXACT:
+                        return stored_eval - repetition_penalty, stored_move
+                    # A bound from a deep enough search narrows the window
+                    if stored_flag == LOWER_BOUND:
+                        alpha = max(alpha, stored_eval)
+                    else:
+                        beta = min(beta, stored_eval)
+                    if alpha >= beta:
+                        return stored_eval - repetition_penalty, stored_move
+                # Its best move is a good first guess either way
+                tt_move = stored_move
+
+            # --- Depth 0: quiescence search. Not stored: its results are cheap to
+            # recompute and would crowd deeper results out of the table ---
+            if depth == 0:
+                score = self.quiescence(board, alpha, beta, color, ply)
+                return score - repetition_penalty, None
+
+            best_move = None
+            max_eval = -INF
+
+            # Hot callables bound to locals once per node (skips attribute lookups per move)
+            make_move = board.make_move
+            unmake_move = board.unmake_move
+            negamax = self.negamax
+            is_check = board.is_check
+            opponent = "b" if color == "w" else "w"
+            killers = self.killer_moves[ply] if ply < MAX_PLY else ()
+            history = self.history[color]
+
+            # Reductions and null moves are only safe when not escaping a check
+            in_check = is_check(color)
+            can_reduce = depth >= LMR_MIN_DEPTH and not in_check
+
+            # --- Null move: passing is legal here, so if the opponent still cannot get
+            # below beta after a free move, a real move will not either. Skipped with
+            # only pawns left, where passing may be better than any move (zugzwang) ---
+            boards = board.bitboards[color]
+            if (
+                allow_null
+                and depth >= NULL_MOVE_MIN_DEPTH
+                and not in_check
+                and ply > 0
+                and beta != INF
+                and boards[KNIGHT] | boards[BISHOP] | boards[ROOK] | boards[QUEEN]
+                # A side already below beta rarely gets above it by passing
+                and self.evaluate_board(board, color) >= beta
+            ):
+                null_score = -negamax(
+                    board,
+                    depth - 1 - NULL_MOVE_REDUCTION,
+                    -beta,
+                    -beta + 1,
+                    opponent,
+                    ply + 1,
+                    False,
+                )[0]
+                if null_score >= beta:
+                    return beta, None
+
+            # The previous iteration's best move is searched first to maximize cutoffs
+            for move_index, move in enumerate(
+                self.ordered_moves(board, color, tt_move, ply)
+            ):
+                move_info = make_move(move[0], move[1])
+                if best_move is None:
+                    # First (expected best) move: full window
+                    eval_score = -negamax(
+                        board, depth - 1, -beta, -alpha, opponent, ply + 1
+                    )[0]
+                elif (
+                    can_reduce
+                    and move_index >= LMR_FULL_DEPTH_MOVES
+                    and move_info["captured"] is None
+                    and move_info["promotion"] is None
+                    and move not in killers
+                    and history.get(move, 0) < HISTORY_SCALE
+                    and not is_check(opponent)
+                ):
+                    # LMR: a late quiet move is searched one ply shallower with a null
+                    # window, and only searched normally if it beats alpha anyway
+                    eval_score = -negamax(
+                        board, depth - 2, -alpha - 1, -alpha, opponent, ply + 1
+                    )[0]
+                    if eval_score > alpha:
+                        eval_score = -negamax(
+                            board, depth - 1, -alpha - 1, -alpha, opponent, ply + 1
+                        )[0]
+                        if alpha < eval_score < beta:
+                            eval_score = -negamax(
+                                board, depth - 1, -beta, -alpha, opponent, ply + 1
+                            )[0]
+                else:
+                    # PVS: prove the move is no better than alpha with a null window,
+                    # and re-search with the full window only if that fails
+                    eval_score = -negamax(
+                        board, depth - 1, -alpha - 1, -alpha, opponent, ply + 1
+                    )[0]
+                    if alpha < eval_score < beta:
+                        eval_score = -negamax(
+                            board, depth - 1, -beta, -alpha, opponent, ply + 1
+                        )[0]
+                unmake_move(move_info)
+
+                if eval_score > max_eval:
+                    max_eval = eval_score
+                    best_move = move
+
+                alpha = max(alpha, eval_score)
+                if alpha >= beta:
+                    # Remember quiet refutations to try them early in sibling nodes
+                    if move_info["captured"] is None and move_info["promotion"] is None:
+                        self.store_killer(ply, move)
+                        self.store_history(color, move, depth)
+                    break
+
+            # --- No legal moves: checkmate or stalemate ---
+            if best_move is None:
+                if board.is_check(color):
+                    score = -self.MATE_SCORE + ply
+                else:
+                    score = -self.STALEMATE_PENALTY
+                self.store_tt(board_key, depth, EXACT, score, None, ply)
+                return score, None
 
-        best_move = None
-        max_eval = float("-inf")
+            # The TT keeps the plain score: the penalty depends on the path to this node
+            flag = self.bound_flag(max_eval, alpha_orig, beta)
+            self.store_tt(board_key, depth, flag, max_eval, best_move, ply)
 
-        for move in moves:
-            move_info = self.make_move_light(board, move[0], move[1])
-            eval_score, _ = self.negamax(
-                board,
-                depth - 1,
-                -beta,
-                -alpha,
-                "b" if color == "w" else "w",
-            )
-            eval_score = -eval_score
-            self.undo_move_light(board, move_info)
+            return max_eval - repetition_penalty, best_move
+        finally:
+            position_counts[board_key] -= 1
+
+    def bound_flag(self, score: int, alpha: int, beta: int) -> int:
+        """
+        Classifies a fail-soft search result against the window it was searched with.
 
-            if eval_score > max_eval:
-                max_eval = eval_score
-                best_move = move
+        Args:
+            score (int): Score returned by the search.
+            alpha (int): Lower bound of the original window.
+            beta (int): Upper bound of the original window.
 
-            alpha = max(alpha, eval_score)
-            if alpha >= beta:
-                break
+        Returns:
+            int: UPPER_BOUND if the search failed low, LOWER_BOUND if it failed high,
+                EXACT otherwise.
+        """
+        if score <= alpha:
+            return UPPER_BOUND
+        if score >= beta:
+            return LOWER_BOUND
+        return EXACT
 
-        # Store in TT with penalty included
-        max_eval -= repetition_penalty
-        self.transposition_table[board_key] = (max_eval, best_move)
+    def probe_tt(self, board_key: int) -> Optional[tuple]:
+        """
+        Looks a position up in the transposition table.
 
-        # Decrement repetition count after recursion
-        self.position_counts[pos_key] -= 1
+        Args:
+            board_key (int): Hash of the position.
 
-        return max_eval, best_move
+        Returns:
+            Optional[tuple]: The (key, depth, flag, score, best_move, age) entry
+                stored for the position, or None.
+        """
+        table = self.transposition_table
+        index = board_key & TT_BUCKET_MASK
+        entry = table[index]
+        if entry is not None and entry[0] == board_key:
+            return entry
+        entry = table[index + 1]
+        if entry is not None and entry[0] == board_key:
+            return entry
+        return None
+
+    def store_tt(
+        self,
+        board_key: int,
+        depth: int,
+        flag: int,
+        score: int,
+        best_move: Optional[Tuple[Tuple[int, int], Tuple[int, int]]],
+        ply: int = 0,
+    ) -> None:
+        """
+        Stores a search result in the transposition table.
 
-    def get_all_moves(
+        Mate scores count plies from the root; they are stored as distance to mate
+        from this position instead, so they stay right when the position is reached
+        again at another ply.
+
+        Entries are kept across iterations and searches. The depth-preferred slot of
+        the position's bucket is only overwritten by a result searched at least as
+        deep, or when its entry is left over from an earlier search; otherwise the
+        result goes to the bucket's always-replaced slot.
+
+        Args:
+            board_key (int): Hash of the position.
+            depth (int): Remaining depth the position was searched to.
+            flag (int): EXACT, LOWER_BOUND or UPPER_BOUND.
+            score (int): Score of the position for the side to move.
+            best_move (Optional[Tuple[start, end]]): Best move found, if any.
+            ply (int): Distance of the position from the root.
+        """
+        if score > self.MATE_BOUND:
+            score += ply
+        elif score < -self.MATE_BOUND:
+            score -= ply
+
+        table = self.transposition_table
+        index = board_key & TT_BUCKET_MASK
+        entry = table[index]
+        if entry is not None and depth < entry[1] and entry[5] == self.tt_age:
+            index += 1
+        table[index] = (board_key, depth, flag, score, best_move, self.tt_age)
+
+    def generate_moves(
+        self, board: Board, color: str
+    ) -> Iterator[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Lazily yields all legal moves for a given color, in generation order
+        (see Board.generate_legal_moves: only the king and pinned pieces, or every
+        piece in check, are tested for king safety move by move).
+
+        Args:
+            board (Board): Current board.
+            color (str): Color to move.
+
+        Returns:
+            Iterator[Tuple[start, end]]: The legal moves.
+        """
+        return board.generate_legal_moves(color)
+
+    def generate_captures(
         self, board: Board, color: str
     ) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
         """
-        Generates all legal moves for a given color.
+        Generates the pseudo-legal captures and promotions of a color, sorted by
+        MVV-LVA.
+
+        Only the squares each piece attacks (and the promotion squares in front of
+        pawns about to promote) are looked at, so no other quiet move is ever
+        generated; the caller must still reject moves that leave its king in check.
 
         Args:
             board (Board): Current board.
             color (str): Color to move.
 
         Returns:
-            List[Tuple[start, end]]: List of legal moves.
+            List[Tuple[start, end]]: Captures and promotions, most valuable victim
+                first.
+        """
+        squares = board.board
+        pawn_targets = PAWN_ATTACK_SQUARES[color]
+        pawn_attacks = PAWN_ATTACKS[color]
+        promotion_row, step = (1, -1) if color == "w" else (6, 1)
+        # Occupancy tests on the bitboards: no Piece dereference per empty square
+        enemy = board.occupied["b" if color == "w" else "w"]
+        occupied = enemy | board.occupied[color]
+        captures = []
+
+        for piece in board.pieces[color]:
+            row, col = piece.row, piece.col
+            square = row * 8 + col
+            type_id = piece.type_id
+            # Leapers: one AND with the attack mask skips a piece with nothing to
+            # take before its target squares are walked
+            if type_id == PAWN:
+                if row == promotion_row and not occupied >> (square + 8 * step) & 1:
+                    captures.append((PROMOTION_SCORE, (row, col), (row + step, col)))
+                if not pawn_attacks[square] & enemy:
+                    continue
+                targets = pawn_targets[square]
+            elif type_id == KNIGHT:
+                if not KNIGHT_ATTACKS[square] & enemy:
+                    continue
+                targets = KNIGHT_SQUARES[square]
+            elif type_id == KING:
+                if not KING_ATTACKS[square] & enemy:
+                    continue
+                targets = KING_SQUARES[square]
+            else:
+                # Sliders: the first occupied square along each ray, found with one
+                # AND and a bit scan instead of stepping through the empty squares
+                targets = []
+                for ray, mask, ascending, steps in SLIDER_LINES[type_id][square]:
+                    blockers = mask & occupied
+                    if blockers:
+                        if ascending:
+                            nearest = blockers & -blockers
+                        else:
+                            nearest = 1 << (blockers.bit_length() - 1)
+                        if nearest & enemy:
+                            targets.append(ray[steps[nearest] - 1])
+
+            for r, c in targets:
+                if enemy >> (r * 8 + c) & 1:
+                    captures.append(
+                        (MVV_LVA[squares[r][c].type_id][type_id], (row, col), (r, c))
+                    )
+
+        captures.sort(key=itemgetter(0), reverse=True)
+        return [(start, end) for _, start, end in captures]
+
+    def store_killer(
+        self, ply: int, move: Tuple[Tuple[int, int], Tuple[int, int]]
+    ) -> None:
+        """
+        Records a quiet move that caused a beta cutoff at the given ply.
+
+        Args:
+            ply (int): Distance from the root.
+            move (Tuple[start, end]): The refuting move.
         """
-        moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = board.board[row][col]
-                if piece and piece.color == color:
-                    for dest in piece.valid_moves(board):
-                        moves.append(((row, col), dest))
+        if ply >= MAX_PLY:
+            return
+        killers = self.killer_moves[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+    def store_history(
+        self, color: str, move: Tuple[Tuple[int, int], Tuple[int, int]], depth: int
+    ) -> None:
+        """
+        Credits a quiet move that caused a beta cutoff in the history table, weighted
+        by depth^2 so cutoffs near the root count most.
+
+        Args:
+            color (str): Color that played the move.
+            move (Tuple[start, end]): The refuting move.
+            depth (int): Remaining depth of the node where it caused the cutoff.
+        """
+        history = self.history[color]
+        history[move] = history.get(move, 0) + depth * depth
 
-        # Sort moves: promotions > captures > others
-        def score_move(move):
+    def order_moves(
+        self,
+        board: Board,
+        moves: Sequence[Tuple[Tuple[int, int], Tuple[int, int]]],
+        ply: Optional[int] = None,
+    ) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Returns the moves sorted for search: promotions > captures (MVV-LVA) > killer
+        moves > other quiet moves by history score > captures that lose material
+        according to static exchange evaluation.
+
+        Args:
+            board (Board): Current board.
+            moves (Sequence[Tuple[start, end]]): Moves to sort (left unchanged).
+            ply (Optional[int]): Distance from the root, to look up killer moves.
+
+        Returns:
+            List[Tuple[start, end]]: A new list of the moves, best first.
+        """
+        killers = self.killer_moves[ply] if ply is not None and ply < MAX_PLY else ()
+        squares = board.board
+        promotion_bonus = PIECE_VALUES[QUEEN]
+        history = None
+
+        # Score every move in one loop, then sort (score, move) pairs by score
+        scored = []
+        for move in moves:
             start, end = move
-            target = board.board[end[0]][end[1]]
-            score = 0
+            target = squares[end[0]][end[1]]
+            piece = squares[start[0]][start[1]]
             if target:
-                score += (
-                    10 * self.piece_values[target.piece_type]
-                    - self.piece_values[board.board[start[0]][start[1]].piece_type]
-                )
+                # Only a capture by a more valuable piece can lose material
+                if PIECE_VALUES[piece.type_id] > PIECE_VALUES[target.type_id]:
+                    exchange = self.see(board, start, end)
+                    if exchange < 0:
+                        scored.append((exchange, move))
+                        continue
+                score = MVV_LVA[target.type_id][piece.type_id]
+            elif move in killers:
+                score = KILLER_SCORE
+            else:
+                # History score, squashed into [0, KILLER_SCORE) to stay below killers
+                if history is None:
+                    history = self.history[piece.color]
+                count = history.get(move, 0)
+                score = KILLER_SCORE * count / (count + HISTORY_SCALE)
             # Bonus for pawn promotion (if applicable)
-            piece = board.board[start[0]][start[1]]
-            if piece.piece_type == "p" and (end[0] == 0 or end[0] == 7):
-                score += 900
-            return score
+            if piece.type_id == PAWN and (end[0] == 0 or end[0] == 7):
+                score += promotion_bonus
+            scored.append((score, move))
+
+        scored.sort(key=itemgetter(0), reverse=True)
+        return [move for _, move in scored]
+
+    def least_valuable_attacker(
+        self, board: Board, square: int, color: str, occupied: int
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Finds the least valuable piece of `color` attacking `square`.
+
+        Only pieces on `occupied` count, and only they block sliders: clearing the
+        bits of pieces that already took part in an exchange reveals the sliders
+        behind them.
+
+        Args:
+            board (Board): Current board.
+            square (int): Attacked square, row * 8 + col.
+            color (str): Color of the attackers.
+            occupied (int): Bitboard of the pieces still on the board.
+
+        Returns:
+            Optional[Tuple[int, int]]: Bit of the attacker's square and its type_id,
+                or None.
+        """
+        own = board.bitboards[color]
+
+        # Pawns attack diagonally forward, so they stand where a pawn of the other
+        # color would attack from
+        attackers = PAWN_ATTACKS["b" if color == "w" else "w"][square] & own[PAWN]
+        attackers &= occupied
+        if attackers:
+            return attackers & -attackers, PAWN
+
+        attackers = KNIGHT_ATTACKS[square] & own[KNIGHT] & occupied
+        if attackers:
+            return attackers & -attackers, KNIGHT
+
+        # Sliders: the nearest occupied square along each ray, in value order
+        bishops, rooks, queens = own[BISHOP], own[ROOK], own[QUEEN]
+        if (bishops | rooks | queens) & occupied:
+            diagonal = nearest_blockers(DIAGONAL_RAY_MASKS[square], square, occupied)
+            attackers = diagonal & bishops
+            if attackers:
+                return attackers & -attackers, BISHOP
+            straight = nearest_blockers(ORTHOGONAL_RAY_MASKS[square], square, occupied)
+            attackers = straight & rooks
+            if attackers:
+                return attackers & -attackers, ROOK
+            attackers = (diagonal | straight) & queens
+            if attackers:
+                return attackers & -attackers, QUEEN
+
+        attackers = KING_ATTACKS[square] & own[KING] & occupied
+        if attackers:
+            return attackers, KING
+
+        return None
+
+    def see(self, board: Board, start: Tuple[int, int], end: Tuple[int, int]) -> int:
+        """
+        Static exchange evaluation of the capture start -> end.
+
+        Plays out the sequence of captures on `end`, each side always recapturing
+        with its least valuable attacker and stopping once recapturing would lose.
+
+        Args:
+            board (Board): Current board.
+            start (Tuple[int, int]): Square of the capturing piece.
+            end (Tuple[int, int]): Square of the captured piece.
+
+        Returns:
+            int: Material balance of the exchange for the side making the capture.
+        """
+        squares = board.board
+        attacker = squares[start[0]][start[1]]
+        gains = [PIECE_VALUES[squares[end[0]][end[1]].type_id]]
+        square = end[0] * 8 + end[1]
+        # The first capturer has left its square
+        occupied = (board.occupied["w"] | board.occupied["b"]) ^ (
+            1 << (start[0] * 8 + start[1])
+        )
+        on_square = PIECE_VALUES[attacker.type_id]
+        side = "b" if attacker.color == "w" else "w"
+
+        while True:
+            next_attacker = self.least_valuable_attacker(board, square, side, occupied)
+            if next_attacker is None:
+                break
+            bit, type_id = next_attacker
+            # Gain for `side` if it captures the piece currently on the square
+            gains.append(on_square - gains[-1])
+            occupied ^= bit
+            on_square = PIECE_VALUES[type_id]
+            side = "b" if side == "w" else "w"
+
+        # Each side may stop the exchange instead of recapturing
+        while len(gains) > 1:
+            last = gains.pop()
+            gains[-1] = -max(-gains[-1], last)
+
+        return gains[0]
+
+    def get_all_moves(
+        self, board: Board, color: str, ply: Optional[int] = None
+    ) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Generates all legal moves for a given color, sorted for search.
+
+        Args:
+            board (Board): Current board.
+            color (str): Color to move.
+            ply (Optional[int]): Distance from the root, to order killer moves.
 
-        moves.sort(key=score_move, reverse=True)
+        Returns:
+            List[Tuple[start, end]]: List of legal moves.
+        """
+        # The cached tuple is scored directly: no working copy of it is made
+        return self.order_moves(board, self.legal_moves(board, color), ply)
+
+    def legal_moves(
+        self, board: Board, color: str
+    ) -> Tuple[Tuple[Tuple[int, int], Tuple[int, int]], ...]:
+        """
+        Returns the legal moves of a position in generation order, cached by the
+        position's Zobrist key for the duration of one get_best_move call. The cache
+        holds at most MOVE_CACHE_SIZE positions (first in, first out).
+
+        Args:
+            board (Board): Current board.
+            color (str): Color to move.
+
+        Returns:
+            Tuple[Tuple[start, end], ...]: Legal moves (shared, do not mutate).
+        """
+        key = board.zobrist_key ^ SIDE_TO_MOVE_KEYS[color]
+        cache = self.move_cache
+        moves = cache.get(key)
+        if moves is None:
+            if len(cache) >= MOVE_CACHE_SIZE:
+                del cache[next(iter(cache))]
+            moves = cache[key] = tuple(self.generate_moves(board, color))
         return moves
 
+    def ordered_moves(
+        self,
+        board: Board,
+        color: str,
+        first_move: Optional[Tuple[Tuple[int, int], Tuple[int, int]]] = None,
+        ply: Optional[int] = None,
+    ) -> Iterator[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Yields moves best-first: `first_move` (if still legal) before the sorted rest.
+
+        The remaining moves are only generated once the caller asks for them, so a
+        cutoff on `first_move` skips move generation for the node entirely.
+
+        Args:
+            board (Board): Current board.
+            color (str): Color to move.
+            first_move (Optional[Tuple[start, end]]): Move to try first (e.g. TT move).
+            ply (Optional[int]): Distance from the root, to order killer moves.
+
+        Yields:
+            Tuple[start, end]: The next move to search.
+        """
+        if first_move is not None:
+            # With the position's moves cached, membership is cheaper than asking
+            # the piece for its (king-safety checked) moves
+            cached = self.move_cache.get(board.zobrist_key ^ SIDE_TO_MOVE_KEYS[color])
+            if cached is not None:
+                legal = first_move in cached
+            else:
+                (start_row, start_col), end = first_move
+                piece = board.board[start_row][start_col]
+                legal = (
+                    piece is not None
+                    and piece.color == color
+                    and end in piece.valid_moves(board)
+                )
+            if legal:
+                yield first_move
+            else:
+                first_move = None
+
+        for move in self.get_all_moves(board, color, ply):
+            if move != first_move:
+                yield move
+
+    def search_root_parallel(
+        self, board: Board, depth: int
+    ) -> Tuple[int, Optional[Tuple[Tuple[int, int], Tuple[int, int]]]]:
+        """
+        Searches the root position with the moves split across worker processes.
+
+        The first (TT) move is searched here to establish alpha; the remaining root
+        moves are then searched in forked processes, each with its own copy of the
+        transposition table. Workers share only that first alpha and their table,
+        killer and history updates are lost, so this does more total work than the
+        serial search and only pays off with spare cores.
+
+        Args:
+            board (Board): Search board, positioned at the root.
+            depth (int): Depth to search.
+
+        Returns:
+            Tuple[int, Optional[Tuple[start, end]]]: Best score and move.
+        """
+        global _root_search
+
+        entry = self.probe_tt(self.board_hash(board, self.color))
+        tt_move = entry[4] if entry is not None else None
+        moves = list(self.ordered_moves(board, self.color, tt_move, 0))
+        if len(moves) < 2:
+            return self.negamax(board, depth, -INF, INF, self.color)
+
+        # The first move is searched here on the full window: its score is exact,
+        # and the table entries, killers and history it leaves stay with this player
+        best_move = moves[0]
+        root_key = self.board_hash(board, self.color)
+        self.position_counts[root_key] = self.position_counts.get(root_key, 0) + 1
+        try:
+            move_info = board.make_move(best_move[0], best_move[1])
+            best_score = -self.negamax(
+                board, depth - 1, -INF, INF, self.opponent_color, 1
+            )[0]
+            board.unmake_move(move_info)
+        finally:
+            self.position_counts[root_key] -= 1
+
+        _root_search = (self, board)
+        try:
+
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(self.workers, mp_context=context) as pool:
+                scores = pool.map(
+                    _search_root_move, moves[1:], repeat(depth), repeat(best_score)
+                )
+                for move, score in zip(moves[1:], scores):
+                    if score > best_score:
+                        best_score, best_move = score, move
+        finally:
+            _root_search = None
+
+        return best_score, best_move
+
     def get_best_move(
-        self, board: Board, max_depth: int = 5
+        self, board: Board, max_depth: int = 5, time_limit: Optional[float] = None
     ) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
         """
         Finds the best move using iterative deepening.
 
+        With a time limit, no new iteration is started once SOFT_TIME_FRACTION of it
+        has passed (the next one would likely not finish), and an iteration still
+        running at the limit is abandoned in favour of the last completed one.
+
+        The transposition table is kept between iterations (its best moves are tried
+        first), and each iteration after the first searches a narrow aspiration
+        window around the previous score, re-searching with a four times wider
+        window and then the full window on failure.
+        With more than one worker, the last iteration runs in search_root_parallel.
+
         Args:
             board (Board): Current board.
             max_depth (int): Maximum search depth.
+            time_limit (Optional[float]): Seconds the search may take, if limited.
 
         Returns:
             Optional[Tuple[start, end]]: Best move found.
         """
-        best_move = None
-        for depth in range(2, max_depth + 1):
-            score, move = self.negamax(
-                board, depth, float("-inf"), float("inf"), self.color
-            )
-            if move:
-                best_move = move
+        start_time = time.monotonic()
+        self.deadline = None
+        self.nodes = 0
+        board = board.copy_into(self.search_board)
+        self.killer_moves = [[None, None] for _ in range(MAX_PLY)]
+        # Age the history instead of clearing it: the previous search's refutations
+        # still order moves, but fresh cutoffs soon outweigh them
+        self.history = {
+            color: {move: count >> 1 for move, count in table.items() if count > 1}
+            for color, table in self.history.items()
+        }
+        self.tt_age += 1
+        # Positions from the previous search rarely recur: start the cache afresh
+        self.move_cache.clear()
 
-            if score >= self.MATE_SCORE - 10:
-                break
+        best_move = None
+        prev_score = None
+        try:
+            for depth in range(2, max_depth + 1):
+                if time_limit is not None and best_move is not None:
+                    elapsed = time.monotonic() - start_time
+                    if elapsed > SOFT_TIME_FRACTION * time_limit:
+                        break
+                    # Only once a move is known can an iteration be abandoned
+                    self.deadline = start_time + time_limit
+
+                # The deepest (most expensive) iteration is split across processes
+                if depth == max_depth and self.workers > 1 and CAN_FORK:
+                    score, move = self.search_root_parallel(board, depth)
+                    if move:
+                        best_move = move
+                    break
+
+                # Outside the window the score is only a bound: search again with a
+                # wider one, and finally with the full window
+                if prev_score is None:
+                    widths = (None,)
+                else:
+                    widths = (ASPIRATION_WINDOW, 4 * ASPIRATION_WINDOW, None)
+                for width in widths:
+                    if width is None:
+                        alpha, beta = -INF, INF
+                    else:
+                        alpha, beta = prev_score - width, prev_score + width
+                    score, move = self.negamax(board, depth, alpha, beta, self.color)
+                    if alpha < score < beta:
+                        break
+                prev_score = score
+
+                if move:
+                    best_move = move
+
+                if score >= self.MATE_SCORE - 10:
+                    break
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
 
         return best_move
@@ -1,15 +1,82 @@
 import sys
 import random
 import pygame
+from collections import Counter
+from functools import lru_cache
 from typing import Tuple, Optional, Any
 
 from settings import *
 
 from src.pieces import *
-from src.board import Board
+from src.board import Board, CASTLING_SQUARES
 from src.computer_player import ComputerPlayer
 
 
+@lru_cache(maxsize=32)
+def get_font(size: int) -> pygame.font.Font:
+    """
+    Returns the default font at the given size, created once and then reused by
+    every menu instead of being rebuilt on each entry.
+
+    Args:
+        size (int): Font size in pixels.
+
+    Returns:
+        pygame.font.Font: The shared font object.
+    """
+    return pygame.font.Font(None, size)
+
+
+@lru_cache(maxsize=64)
+def render_text(text: str, size: int, color: Tuple[int, int, int]) -> pygame.Surface:
+    """
+    Renders a line of menu text, memoized so each (text, size, color) combination,
+    e.g. a label in its normal and hover color, is rasterized only once.
+
+    Args:
+        text (str): The text to render.
+        size (int): Font size in pixels.
+        color (Tuple[int, int, int]): RGB text color.
+
+    Returns:
+        pygame.Surface: The rendered text (shared, do not draw onto it).
+    """
+    return get_font(size).render(text, True, color)
+
+
+# Posted by a one-shot timer in cvc mode when the next computer move is due, so
+# the loop keeps handling events while it waits
+COMPUTER_MOVE_EVENT = pygame.USEREVENT + 1
+CVC_MOVE_DELAY = 500  # Milliseconds between computer moves in cvc mode
+
+# Promotion menu, built once: one button per piece a pawn can promote to, as
+# parallel sequences indexed by button, centered on the board
+PROMOTION_CLASSES = (Queen, Rook, Bishop, Knight)
+PROMOTION_IMAGES = {
+    color: [PIECES[color + piece_type] for piece_type in "qrbn"] for color in "wb"
+}
+PROMOTION_RECTS = [
+    pygame.Rect(
+        WIDTH // 2 - 2 * SQUARE_SIZE + i * SQUARE_SIZE,
+        HEIGHT // 2 - SQUARE_SIZE // 2,
+        SQUARE_SIZE,
+        SQUARE_SIZE,
+    )
+    for i in range(len(PROMOTION_CLASSES))
+]
+
+
+def rounded_square(color: Tuple[int, int, int]) -> pygame.Surface:
+    """Returns a square the size of a board square, filled with rounded corners."""
+    square = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+    pygame.draw.rect(square, color, square.get_rect(), border_radius=10)
+    return square
+
+
+# Button backgrounds: default and hovered
+PROMOTION_SQUARES = (rounded_square(BLACK), rounded_square(CLEAR_BLUE))
+
+
 class Game:
     def __init__(self):
         """
@@ -18,16 +85,33 @@ class Game:
         """
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("Chess Game")
+        # Menu background, scaled once and converted to the display's pixel format
+        self.menu_background = pygame.transform.scale(
+            TITLE_BG, (WIDTH, HEIGHT)
+        ).convert()
         self.board = Board()
         self.selected_piece = None
         self.turn = "w"  # White starts
         self.flipped = False
         self.running = True
         self.computer_player = None
+        # Set by key handlers to leave the run loop for "menu" or "restart"
+        self.next_screen: Optional[str] = None
 
         self.position_history = []
-        self.position_counts = {}
+        self.position_counts = Counter()  # Zobrist position key -> occurrences
         self.halfmove_clock = 0
+        self.clock = pygame.time.Clock()  # Caps the frame rate of menu and game loops
+
+        # In-game event handlers keyed by event type, looked up once per event
+        self.event_handlers = {
+            pygame.QUIT: self.handle_quit,
+            pygame.MOUSEBUTTONDOWN: self.handle_mouse_down,
+            pygame.MOUSEBUTTONUP: self.handle_mouse_up,
+            pygame.KEYDOWN: self.handle_key_press,
+            pygame.WINDOWEXPOSED: self.handle_expose,
+            COMPUTER_MOVE_EVENT: self.handle_computer_move_event,
+        }
 
         self.setup_phase()  # Call setup_phase to select game mode
 
@@ -37,45 +121,53 @@ class Game:
         Options include Player vs Player, Player vs Computer, Computer Vs Computer and Help.
         The game proceeds based on the user's selection.
         """
-        background = pygame.image.load("background/title.jpg")
-        background = pygame.transform.scale(background, (WIDTH, HEIGHT))
-        font = pygame.font.Font(None, 48)
-        title_font = pygame.font.Font(None, 72)
-
-        title_text = title_font.render("Chess Game", True, (255, 255, 255))
-        author_text = font.render("Created by KingFlow-23", True, (200, 200, 200))
-        pvp_text = font.render("1. Player vs Player", True, (255, 255, 255))
-        pvc_text = font.render("2. Player vs Computer", True, (255, 255, 255))
-        cvc_text = font.render("3. Computer vs Computer", True, (255, 255, 255))
-        help_text = font.render("4. Help", True, (255, 255, 255))
+        background = self.menu_background
+
+        title_text = render_text("Chess Game", 72, WHITE)
+        author_text = render_text("Created by KingFlow-23", 48, (200, 200, 200))
 
         # Define button areas (rectangles)
-        pvp_rect = pygame.Rect(
-            WIDTH // 2 - 180, HEIGHT // 2.7, pvp_text.get_width(), pvp_text.get_height()
+        pvp_rect = render_text("1. Player vs Player", 48, WHITE).get_rect(
+            topleft=(WIDTH // 2 - 180, HEIGHT // 2.7)
+        )
+        pvc_rect = render_text("2. Player vs Computer", 48, WHITE).get_rect(
+            topleft=(WIDTH // 2 - 180, HEIGHT // 2.3)
         )
-        pvc_rect = pygame.Rect(
-            WIDTH // 2 - 180, HEIGHT // 2.3, pvc_text.get_width(), pvc_text.get_height()
+        cvc_rect = render_text("3. Computer vs Computer", 48, WHITE).get_rect(
+            topleft=(WIDTH // 2 - 180, HEIGHT // 2)
         )
-        cvc_rect = pygame.Rect(
-            WIDTH // 2 - 180, HEIGHT // 2, cvc_text.get_width(), cvc_text.get_height()
+        help_rect = render_text("4. Help", 48, WHITE).get_rect(
+            topleft=(WIDTH // 2 - 180, HEIGHT // 1.78)
         )
-        help_rect = pygame.Rect(
-            WIDTH // 2 - 180,
-            HEIGHT // 1.78,
-            help_text.get_width(),
-            help_text.get_height(),
+        buttons = (
+            ("1. Player vs Player", pvp_rect),
+            ("2. Player vs Computer", pvc_rect),
+            ("3. Computer vs Computer", cvc_rect),
+            ("4. Help", help_rect),
         )
 
         running = True
+        redraw = True
+        prev_hovered = None
         while running:
-            self.screen.blit(background, (0, 0))
-            self.screen.blit(title_text, (WIDTH // 2 - 150, HEIGHT // 6 - 50))
-            self.screen.blit(author_text, (WIDTH // 2 - 190, HEIGHT // 4 - 50))
-            self.screen.blit(pvp_text, (WIDTH // 2 - 180, HEIGHT // 2.7))
-            self.screen.blit(pvc_text, (WIDTH // 2 - 180, HEIGHT // 2.3))
-            self.screen.blit(cvc_text, (WIDTH // 2 - 180, HEIGHT // 2))
-            self.screen.blit(help_text, (WIDTH // 2 - 180, HEIGHT // 1.78))
-            pygame.display.flip()
+            # Highlight menu options on mouse hover
+            mouse_pos = pygame.mouse.get_pos()
+            hovered = next(
+                (label for label, rect in buttons if rect.collidepoint(mouse_pos)),
+                None,
+            )
+
+            # The menu is static, so only repaint when the hovered option changes
+            if redraw or hovered != prev_hovered:
+                self.screen.blit(background, (0, 0))
+                self.screen.blit(title_text, (WIDTH // 2 - 150, HEIGHT // 6 - 50))
+                self.screen.blit(author_text, (WIDTH // 2 - 190, HEIGHT // 4 - 50))
+                for label, rect in buttons:
+                    color = YELLOW if label == hovered else WHITE
+                    self.screen.blit(render_text(label, 48, color), rect)
+                pygame.display.flip()
+                redraw = False
+                prev_hovered = hovered
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -87,12 +179,6 @@ class Game:
                         pygame.quit()
                         exit()
 
-                    elif event.key == pygame.K_BACKSPACE:
-                        # Go back to the main menu
-                        self.setup_phase()
-                        # Restart the run loop with the newly chosen game mode
-                        self.run(self.game_mode)
-
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_1:
                         self.game_mode = "pvp"
@@ -124,42 +210,9 @@ class Game:
                             self.game_mode = "help"
                             running = False
 
-                # Highlight menu options on mouse hover
-                if event.type == pygame.MOUSEMOTION:
-                    mouse_pos = pygame.mouse.get_pos()
-                    if pvp_rect.collidepoint(mouse_pos):
-                        pvp_text = font.render(
-                            "1. Player vs Player", True, (255, 255, 0)
-                        )  # Yellow for hover
-                    else:
-                        pvp_text = font.render(
-                            "1. Player vs Player", True, (255, 255, 255)
-                        )  # White by default
-
-                    if pvc_rect.collidepoint(mouse_pos):
-                        pvc_text = font.render(
-                            "2. Player vs Computer", True, (255, 255, 0)
-                        )
-                    else:
-                        pvc_text = font.render(
-                            "2. Player vs Computer", True, (255, 255, 255)
-                        )
-
-                    if cvc_rect.collidepoint(mouse_pos):
-                        cvc_text = font.render(
-                            "3. Computer vs Computer", True, (255, 255, 0)
-                        )
-                    else:
-                        cvc_text = font.render(
-                            "3. Computer vs Computer", True, (255, 255, 255)
-                        )
-
-                    if help_rect.collidepoint(mouse_pos):
-                        help_text = font.render("4. Help", True, (255, 255, 0))
-                    else:
-                        help_text = font.render("4. Help", True, (255, 255, 255))
+            self.clock.tick(FPS)
 
-    def choose_color_menu(self, screen) -> Tuple[str, str]:
+    def choose_color_menu(self, screen) -> Optional[Tuple[str, str]]:
         """
         Displays an in-game menu for the player to choose their color or choose a random option.
 
@@ -167,56 +220,60 @@ class Game:
             screen (pygame.Surface): The game display surface.
 
         Returns:
-            Tuple[str, str]: A tuple containing (player_color, computer_color)
-                            where each is either "w" or "b".
+            Optional[Tuple[str, str]]: A tuple containing (player_color, computer_color)
+                            where each is either "w" or "b", or None if the player
+                            pressed Backspace to go back to the main menu.
         """
-        background = pygame.transform.scale(TITLE_BG, (WIDTH, HEIGHT))
-
-        font = pygame.font.Font(None, 60)
         white_button = pygame.Rect(100, 125, 290, 100)
         black_button = pygame.Rect(500, 125, 290, 100)
         random_button = pygame.Rect(300, 350, 275, 100)
+        buttons = (
+            ("Play as White", white_button, 10),
+            ("Play as Black", black_button, 10),
+            ("Random", random_button, 50),
+        )
+
+        # The background and the grey buttons never change: compose them once
+        background = self.menu_background.copy()
+        for _, button, _ in buttons:
+            background.fill((200, 200, 200), button)
 
         running = True
         player_color = None
+        redraw = True
+        prev_hovered = None
 
         while running:
-            screen.blit(background, (0, 0))
-
             mouse_pos = pygame.mouse.get_pos()
+            hovered = next(
+                (
+                    label
+                    for label, button, _ in buttons
+                    if button.collidepoint(mouse_pos)
+                ),
+                None,
+            )
 
-            # --- White button ---
-            if white_button.collidepoint(mouse_pos):
-                white_text = font.render(
-                    "Play as White", True, (255, 255, 0)
-                )  # Yellow hover
-            else:
-                white_text = font.render(
-                    "Play as White", True, (0, 0, 0)
-                )  # Black default
-
-            # --- Black button ---
-            if black_button.collidepoint(mouse_pos):
-                black_text = font.render("Play as Black", True, (255, 255, 0))
-            else:
-                black_text = font.render("Play as Black", True, (0, 0, 0))
-
-            # --- Random button ---
-            if random_button.collidepoint(mouse_pos):
-                random_text = font.render("Random", True, (255, 255, 0))
-            else:
-                random_text = font.render("Random", True, (0, 0, 0))
-
-            # Draw buttons
-            pygame.draw.rect(screen, (200, 200, 200), white_button)
-            pygame.draw.rect(screen, (200, 200, 200), black_button)
-            pygame.draw.rect(screen, (200, 200, 200), random_button)
-
-            screen.blit(white_text, (white_button.x + 10, white_button.y + 30))
-            screen.blit(black_text, (black_button.x + 10, black_button.y + 30))
-            screen.blit(random_text, (random_button.x + 50, random_button.y + 30))
+            # Only repaint when the hovered button changes
+            if redraw or hovered != prev_hovered:
+                # Background with buttons, then the labels (yellow hover, black
+                # default), in one blits call
+                screen.blits(
+                    [(background, (0, 0))]
+                    + [
+                        (
+                            render_text(
+                                label, 60, YELLOW if label == hovered else BLACK
+                            ),
+                            (button.x + x_offset, button.y + 30),
+                        )
+                        for label, button, x_offset in buttons
+                    ]
+                )
 
-            pygame.display.flip()
+                pygame.display.flip()
+                redraw = False
+                prev_hovered = hovered
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -229,10 +286,7 @@ class Game:
                         exit()
 
                     elif event.key == pygame.K_BACKSPACE:
-                        # Go back to the main menu
-                        self.setup_phase()
-                        # Restart the run loop with the newly chosen game mode
-                        self.run(self.game_mode)
+                        return None  # Go back to the main menu
 
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     pos = pygame.mouse.get_pos()
@@ -246,18 +300,21 @@ class Game:
                         player_color = random.choice(["w", "b"])
                         running = False
 
+            self.clock.tick(FPS)
+
         # Computer gets the opposite color.
         computer_color = "w" if player_color == "b" else "b"
         return player_color, computer_color
 
-    def display_help(self):
+    def display_help(self) -> None:
         """
         Displays a help screen with instructions for the user on how to play the game.
-        The screen provides key controls and rules, and waits for user input to return to the main menu.
+        The screen provides key controls and rules, and returns once a key is pressed,
+        the caller then going back to the main menu.
         """
         self.screen.fill((0, 0, 0))  # Fill the screen with black to create a background
-        title_font = pygame.font.Font(None, 48)
-        font = pygame.font.Font(None, 36)  # Set font for the instructions
+        title_font = get_font(48)
+        font = get_font(36)  # Set font for the instructions
 
         # Instructions and game controls
         title_text = title_font.render("Chess Game Help", True, (255, 255, 255))
@@ -292,27 +349,19 @@ class Game:
         # Update the display
         pygame.display.flip()
 
-        # Wait for the user to press any key to return to the main menu
+        # Wait for the user to press any key to return to the main menu. The screen
+        # is static, so block until an event arrives instead of polling
         waiting = True
         while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                waiting = False  # Exit help screen when a key is pressed
+                if event.key == pygame.K_ESCAPE:
                     pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    waiting = False  # Exit help screen when a key is pressed
-                    if event.key == pygame.K_ESCAPE:
-                        pygame.quit()
-                        sys.exit()  # Exit the game if Escape is pressed
-
-                    elif event.key == pygame.K_BACKSPACE:
-                        # Go back to the main menu
-                        self.setup_phase()
-                        # Restart the run loop with the newly chosen game mode
-                        self.run(self.game_mode)
-
-                    elif event.key == pygame.K_RETURN:
-                        self.setup_phase()  # Return to the main menu if Enter is pressed
+                    sys.exit()  # Exit the game if Escape is pressed
 
     def undo_move(self):
         """
@@ -333,8 +382,7 @@ class Game:
             )  # Check if en passant happened
             was_castling = last_move.get("castling", None)  # Check if castling happened
             was_promotion = last_move.get("promotion", False)
-            king_moved = last_move.get("king_moved", None)
-            rook_moved = last_move.get("rook_moved", None)
+            castling_rights = last_move["castling_rights"]
             saved_halfmove = last_move.get("halfmove_clock", 0)
             pos_key = last_move.get("pos_key")
 
@@ -360,9 +408,6 @@ class Game:
                         7
                     ].col = 7  # Restore rook's original column
 
-                    self.board.king_moved[piece.color] = False
-                    self.board.rook_moved[f"{piece.color}_kingside"] = False
-
             elif was_castling == "queenside":
                 self.board.board[start_row][start_col] = piece  # Restore the king
                 self.board.board[end_row][2] = None  # Clear the castled king's position
@@ -376,9 +421,6 @@ class Game:
                         0
                     ].col = 0  # Restore rook's original column
 
-                    self.board.king_moved[piece.color] = False
-                    self.board.rook_moved[f"{piece.color}_queenside"] = False
-
             else:
                 # Place the piece back to its start position
                 self.board.board[start_row][start_col] = piece
@@ -406,18 +448,18 @@ class Game:
             piece.row = start_row
             piece.col = start_col
 
-            # Update the king and rook moved flags
-            if isinstance(piece, King) and king_moved:
+            # Update the king position
+            if piece.type_id == KING:
                 if piece.color == "w":
                     self.board.white_king = (start_row, start_col)
                 else:
                     self.board.black_king = (start_row, start_col)
 
-            # Restore the king and rook moved flags
-            if king_moved:
-                self.board.king_moved = king_moved
-            if rook_moved:
-                self.board.rook_moved = rook_moved
+            # Restore the castling rights held before the move
+            self.board.castling_rights = castling_rights
+
+            # The matrix was edited directly: resync the board's piece lists
+            self.board.refresh_state()
 
             # Restore halfmove clock
             self.halfmove_clock = saved_halfmove
@@ -431,9 +473,7 @@ class Game:
             # Recompute current position key
             current_key = self.get_position_key()
             self.position_history.append(current_key)
-            self.position_counts[current_key] = (
-                self.position_counts.get(current_key, 0) + 1
-            )
+            self.position_counts[current_key] += 1
 
     def undo_turn(self):
         """
@@ -473,8 +513,7 @@ class Game:
             was_en_passant = next_move.get("en_passant", False)
             was_castling = next_move.get("castling", None)
             was_promotion = next_move.get("promotion", False)
-            king_moved = next_move.get("king_moved", None)
-            rook_moved = next_move.get("rook_moved", None)
+            castling_rights = next_move["castling_rights"]
             saved_halfmove = next_move.get("halfmove_clock", 0)
             pos_key = next_move.get("pos_key")
 
@@ -528,20 +567,22 @@ class Game:
             piece.row = end_row
             piece.col = end_col
 
-            # Update the king and rook moved flags
-            if isinstance(piece, King):
-                self.board.king_moved[piece.color] = king_moved[piece.color]
+            # Update the king position
+            if piece.type_id == KING:
                 if piece.color == "w":
                     self.board.white_king = (end_row, end_col)
                 else:
                     self.board.black_king = (end_row, end_col)
 
-            if isinstance(piece, Rook):
-                self.board.rook_moved[
-                    f"{piece.color}_{'kingside' if piece.col >= 4 else 'queenside'}"
-                ] = rook_moved[
-                    f"{piece.color}_{'kingside' if piece.col >= 4 else 'queenside'}"
-                ]
+            # The rights held before the move, minus those of the home squares it
+            # left or captured on
+            self.board.castling_rights = castling_rights & ~(
+                CASTLING_SQUARES.get((start_row, start_col), 0)
+                | CASTLING_SQUARES.get((end_row, end_col), 0)
+            )
+
+            # The matrix was edited directly: resync the board's piece lists
+            self.board.refresh_state()
 
             # Switch the turn
             self.turn = "b" if self.turn == "w" else "w"
@@ -552,9 +593,7 @@ class Game:
             # Recompute current position key
             current_key = self.get_position_key()
             self.position_history.append(current_key)
-            self.position_counts[current_key] = (
-                self.position_counts.get(current_key, 0) + 1
-            )
+            self.position_counts[current_key] += 1
 
     def redo_turn(self):
         """
@@ -580,54 +619,43 @@ class Game:
         Opens a promotion menu next to the game window, showing promotion choices without covering the board.
         Highlights a piece only when hovered.
         """
-        choices = ["q", "r", "b", "n"]  # Possible promotions
-        piece_classes = {"q": Queen, "r": Rook, "b": Bishop, "n": Knight}
-
-        # Get piece images
-        piece_images = {choice: PIECES[f"{pawn.color}{choice}"] for choice in choices}
+        piece_images = PROMOTION_IMAGES[pawn.color]
+        button_rects = PROMOTION_RECTS
+        default_square, hovered_square = PROMOTION_SQUARES
 
-        menu_y = HEIGHT // 2 - (SQUARE_SIZE // 2)  # Centered vertically
-        menu_x = (WIDTH // 2) - (2 * SQUARE_SIZE)  # Centered horizontally
-
-        # Create button rects
-        button_rects = []
-        for i, choice in enumerate(choices):
-            rect = pygame.Rect(
-                menu_x + i * SQUARE_SIZE, menu_y, SQUARE_SIZE, SQUARE_SIZE
-            )
-            button_rects.append((rect, choice))
+        prev_hovered = None  # Forces the first draw
 
         while True:
 
             mouse_pos = pygame.mouse.get_pos()
-            hovered_choice = None
-
-            for rect, choice in button_rects:
-                if rect.collidepoint(mouse_pos):
-                    pygame.draw.rect(
-                        self.screen, CLEAR_BLUE, rect, border_radius=10
-                    )  # Highlight only when hovered
-                    hovered_choice = choice
-
-                else:
-                    pygame.draw.rect(
-                        self.screen, BLACK, rect, border_radius=10
-                    )  # Default color
-
-                self.screen.blit(piece_images[choice], (rect.x, rect.y))  # Draw pieces
+            hovered = pygame.Rect(mouse_pos, (1, 1)).collidelist(button_rects)
+
+            # Only the buttons change, so repaint just their rects on hover changes
+            if hovered != prev_hovered:
+                # Highlight only the hovered square, then draw the pieces on top
+                self.screen.blits(
+                    [
+                        (hovered_square if i == hovered else default_square, rect)
+                        for i, rect in enumerate(button_rects)
+                    ]
+                    + list(zip(piece_images, button_rects))
+                )
 
-            pygame.display.flip()
+                pygame.display.update(button_rects)
+                prev_hovered = hovered
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     return None
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    for rect, choice in button_rects:
-                        if rect.collidepoint(event.pos):
-                            return piece_classes[choice](
-                                end_move[0], end_move[1], pawn.color
-                            )
+                    clicked = pygame.Rect(event.pos, (1, 1)).collidelist(button_rects)
+                    if clicked != -1:
+                        return PROMOTION_CLASSES[clicked](
+                            end_move[0], end_move[1], pawn.color
+                        )
+
+            self.clock.tick(FPS)
 
     def initialize_game_state(self) -> None:
         """
@@ -647,14 +675,21 @@ class Game:
         self.last_move_end: Tuple[int, int] = (-1, -1)
         self.was_there_enemy: bool = False
         self.ai_moved: bool = False
+        self.selected_moves: frozenset = frozenset()  # Legal targets of the held piece
+        # Full redraw needed next frame (set whenever the board or selection changes)
+        self.needs_redraw: bool = True
+        # Frame without the dragged piece, and where the piece was last blitted
+        self.drag_background: Optional[pygame.Surface] = None
+        self.drag_rect: Optional[pygame.Rect] = None
 
     def draw_board_and_pieces(self) -> None:
         """
         Renders the board and all pieces onto the screen.
 
         First, it draws the board, then highlights valid moves if a piece is selected.
-        If a piece is being dragged, it draws the piece at the current mouse position.
-        Finally, it highlights the last move made.
+        Then it highlights the last move made. Finally, if a piece is being dragged, it
+        keeps a copy of the frame without it (see update_dragged_piece) and draws the
+        piece at the current mouse position.
         """
         self.board.draw(self.screen, self.flipped)
 
@@ -665,6 +700,7 @@ class Game:
                     self.selected_piece,
                     (self.last_move_piece, self.last_move_start, self.last_move_end),
                     flipped=self.flipped,
+                    valid_moves=self.selected_moves,
                 )
 
             if self.dragging_piece:
@@ -686,12 +722,6 @@ class Game:
                     (screen_x, screen_y, SQUARE_SIZE, SQUARE_SIZE),
                 )
 
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                self.screen.blit(
-                    self.selected_piece.image,
-                    (mouse_x - self.offset_x, mouse_y - self.offset_y),
-                )
-
         self.board.highlight_last_move(
             self.screen,
             (self.last_move_start, self.last_move_end),
@@ -699,27 +729,77 @@ class Game:
             flipped=self.flipped,
         )
 
+        if self.selected_piece and self.dragging_piece:
+            self.drag_background = self.screen.copy()
+            mouse_x, mouse_y = pygame.mouse.get_pos()
+            self.drag_rect = self.screen.blit(
+                self.selected_piece.image,
+                (mouse_x - self.offset_x, mouse_y - self.offset_y),
+            )
+
+    def update_dragged_piece(self) -> None:
+        """
+        Moves the dragged piece to the mouse without redrawing the board: the area it
+        covered is restored from the frame saved by draw_board_and_pieces, the piece is
+        blitted at its new position, and only those two rects are sent to the display.
+        """
+        mouse_x, mouse_y = pygame.mouse.get_pos()
+        new_rect = self.selected_piece.image.get_rect(
+            topleft=(mouse_x - self.offset_x, mouse_y - self.offset_y)
+        )
+        if new_rect == self.drag_rect:
+            return
+
+        self.screen.blit(self.drag_background, self.drag_rect, self.drag_rect)
+        self.screen.blit(self.selected_piece.image, new_rect)
+        pygame.display.update([self.drag_rect, new_rect])
+        self.drag_rect = new_rect
+
     def handle_events(self) -> None:
         """
         Processes all user input events (mouse, keyboard, and quit events).
 
-        Delegates mouse down, motion, up, and keypress events to their respective handlers.
+        Delegates quit, mouse down, mouse up, and keypress events to their respective
+        handlers through the event_handlers table; other event types are ignored.
+        Mouse motion needs no handler: the run loop moves a dragged piece to the
+        current mouse position every frame.
         """
+        event_handlers = self.event_handlers
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
+            handler = event_handlers.get(event.type)
+            if handler:
+                handler(event)
+
+    def handle_expose(self, event: pygame.event.Event) -> None:
+        """
+        Handles the window being uncovered by redrawing it on the next frame.
+
+        Args:
+            event (pygame.event.Event): The window exposed event.
+        """
+        self.needs_redraw = True
 
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                self.handle_mouse_down(event)
+    def handle_computer_move_event(self, event: pygame.event.Event) -> None:
+        """
+        Plays the next computer move in cvc mode, then schedules the one after.
 
-            elif event.type == pygame.MOUSEMOTION:
-                self.handle_mouse_motion()
+        Args:
+            event (pygame.event.Event): The computer move timer event.
+        """
+        if self.game_mode != "cvc":
+            return  # A timer left over from a previous game
+        self.computer_move()
+        if self.running and self.next_screen is None:
+            pygame.time.set_timer(COMPUTER_MOVE_EVENT, CVC_MOVE_DELAY, loops=1)
 
-            elif event.type == pygame.MOUSEBUTTONUP:
-                self.handle_mouse_up(event)
+    def handle_quit(self, event: pygame.event.Event) -> None:
+        """
+        Handles the window close event by stopping the main loop.
 
-            elif event.type == pygame.KEYDOWN:
-                self.handle_key_press(event)
+        Args:
+            event (pygame.event.Event): The quit event.
+        """
+        self.running = False
 
     def handle_mouse_down(self, event: pygame.event.Event) -> None:
         """
@@ -749,21 +829,23 @@ class Game:
         if piece and piece.color == self.turn:
             self.selected_piece = piece
             self.dragging_piece = True
+            self.needs_redraw = True  # Show the valid moves and lift the piece
+
+            # The position cannot change while the piece is held: compute its moves
+            # once for the highlights and the drop (memoized by the board, so
+            # picking the piece up again in this position costs a lookup)
+            self.selected_moves = frozenset(
+                self.board.legal_moves(
+                    piece,
+                    (self.last_move_piece, self.last_move_start, self.last_move_end),
+                )
+            )
 
             # ✅ Use to_screen_coords so offsets are correct when flipped
             square_x, square_y = self.board.to_screen_coords(row, col, self.flipped)
             self.offset_x = x - square_x
             self.offset_y = y - square_y
 
-    def handle_mouse_motion(self) -> None:
-        """Handles mouse movement while dragging a piece."""
-        if self.dragging_piece and self.selected_piece:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            self.screen.blit(
-                self.selected_piece.image,
-                (mouse_x - self.offset_x, mouse_y - self.offset_y),
-            )
-
     def handle_mouse_up(self, event: pygame.event.Event) -> None:
         """
         Handles mouse button release events (dropping a piece).
@@ -780,9 +862,7 @@ class Game:
         x, y = event.pos
         row, col = self.board.from_screen_coords(x, y, self.flipped)
 
-        if self.selected_piece and (row, col) in self.selected_piece.valid_moves(
-            self.board, (self.last_move_piece, self.last_move_start, self.last_move_end)
-        ):
+        if self.selected_piece and (row, col) in self.selected_moves:
             self.perform_move(row, col)
 
         else:
@@ -791,6 +871,7 @@ class Game:
 
         self.dragging_piece = False
         self.selected_piece = None
+        self.needs_redraw = True
 
     def get_last_move(self) -> Tuple[Optional[Any], Tuple[int, int], Tuple[int, int]]:
         """
@@ -802,7 +883,7 @@ class Game:
                 - The starting position (row, col) of the last move,
                 - The ending position (row, col) of the last move.
         """
-        if len(self.move_history) > 0:
+        if self.move_history:
             last_move = self.move_history[-1]
             return last_move["piece"], last_move["start"], last_move["end"]
         return None, (0, 0), (0, 0)
@@ -812,10 +893,8 @@ class Game:
         piece: Any,
         row: int,
         col: int,
-        prev_piece: Any,
-        prev_start: Tuple[int, int],
-        prev_end: Tuple[int, int],
-    ) -> Optional[Any]:
+        last_move: Tuple[Optional[Any], Tuple[int, int], Tuple[int, int]],
+    ) -> Tuple[Optional[Any], bool]:
         """
         Determines if a capture occurred during a move.
 
@@ -827,101 +906,67 @@ class Game:
             piece: The piece being moved.
             row (int): The destination row.
             col (int): The destination column.
-            prev_piece: The piece involved in the previous move.
-            prev_start (Tuple[int, int]): The starting position of the previous move.
-            prev_end (Tuple[int, int]): The ending position of the previous move.
+            last_move (tuple): The previous move as returned by get_last_move
+                (piece, start, end).
 
         Returns:
-            The captured piece if one was captured; otherwise, None.
+            Tuple[Optional[Any], bool]: The captured piece if one was captured
+                (otherwise None), and whether the move is an en passant capture.
         """
         if self.board.board[row][col]:
-            return self.board.board[row][col]
+            return self.board.board[row][col], False
 
         if self.board.is_en_passant(
-            piece,
-            (piece.row, piece.col),
-            (row, col),
-            (prev_piece, prev_start, prev_end),
+            piece, (piece.row, piece.col), (row, col), last_move
         ):
-            return self.board.board[prev_end[0]][prev_end[1]]
-        return None
+            prev_end = last_move[2]
+            return self.board.board[prev_end[0]][prev_end[1]], True
+        return None, False
 
-    def get_position_key(self) -> str:
+    def get_position_key(self) -> int:
         """
         Generate a key that uniquely identifies the current position for repetition checks.
         Includes: piece placement, turn, castling rights, and en passant (if valid).
-        """
-        # Piece placement
-        board_str = ""
-        for row in self.board.board:
-            for piece in row:
-                if piece:
-                    board_str += piece.color + piece.piece_type
-                else:
-                    board_str += "--"
 
-        # Whose turn
-        turn_str = self.turn
-
-        # Castling rights
-        castling_str = "".join([k for k, v in self.board.rook_moved.items() if not v])
-        if not castling_str:
-            castling_str = "-"
-
-        # En passant
-        en_passant_str = "-"
-        if self.move_history:
-            last_move = self.move_history[-1]
-            if last_move["piece"].piece_type == "p":
-                start_row, start_col = last_move["start"]
-                end_row, end_col = last_move["end"]
-
-                # Double pawn move
-                if abs(start_row - end_row) == 2:
-                    # Check if an enemy pawn can actually capture
-                    ep_row = (start_row + end_row) // 2
-                    ep_col = start_col
-                    for dc in [-1, 1]:
-                        adj_col = ep_col + dc
-                        if 0 <= adj_col < 8:
-                            adj_piece = self.board.board[ep_row][adj_col]
-                            if (
-                                adj_piece
-                                and adj_piece.color != last_move["piece"].color
-                                and adj_piece.piece_type == "p"
-                            ):
-                                en_passant_str = f"{ep_row}{ep_col}"
-                                break
-
-        return f"{board_str}_{turn_str}_{castling_str}_{en_passant_str}"
+        Returns:
+            int: The board's Zobrist key (pieces and castling rights, maintained
+                incrementally) with the side to move and en passant file folded in.
+        """
+        last_move = self.move_history[-1] if self.move_history else None
+        return self.board.position_key(self.turn, last_move)
 
     def check_game_status(self) -> None:
         """
-        Checks for game-ending conditions (checkmate or stalemate).
+        Checks for game-ending conditions (checkmate, stalemate, repetition or the
+        50-move rule).
+
+        The draw rules are a dict lookup and an int comparison, so they are tested
+        before checkmate and stalemate, which need move generation. A position that
+        has occurred before cannot be checkmate (the game would have ended), but
+        checkmate takes precedence over the 50-move rule.
 
-        If either condition is met, the board is redrawn, the game loop is terminated,
+        If any condition is met, the board is redrawn, the game loop is terminated,
         and the endgame message is displayed.
         """
-        if self.board.is_checkmate(self.turn):
+        if self.check_threefold_repetition():
             self.board.draw(self.screen, self.flipped)
             self.running = False
-            self.endgame("Checkmate", self.turn)
+            self.endgame("Draw by repetition", self.turn)
 
-        elif self.board.is_stalemate(self.turn):
+        elif self.fifty_move_rule() and not self.board.is_checkmate(self.turn):
             self.board.draw(self.screen, self.flipped)
             self.running = False
-            self.endgame("Draw", self.turn)
+            self.endgame("Draw by 50-move rule", self.turn)
 
-        elif self.check_threefold_repetition():
+        elif self.board.is_checkmate(self.turn):
             self.board.draw(self.screen, self.flipped)
             self.running = False
-            self.endgame("Draw by repetition", self.turn)
+            self.endgame("Checkmate", self.turn)
 
-        # (optional) add 50-move rule:
-        elif self.fifty_move_rule():
+        elif self.board.is_stalemate(self.turn):
             self.board.draw(self.screen, self.flipped)
             self.running = False
-            self.endgame("Draw by 50-move rule", self.turn)
+            self.endgame("Draw", self.turn)
 
     def handle_key_press(self, event: pygame.event.Event) -> None:
         """
@@ -939,20 +984,19 @@ class Game:
         Args:
             event (pygame.event.Event): The keypress event.
         """
+        self.needs_redraw = True  # Undo/redo and the valid-moves toggle change the view
+
         if event.key == pygame.K_ESCAPE:
             # Quit the whole game
             pygame.quit()
             sys.exit()
 
         elif event.key == pygame.K_BACKSPACE:
-            # Go back to the main menu
-            self.setup_phase()
-            # Restart the run loop with the newly chosen game mode
-            self.run(self.game_mode)
+            # Go back to the main menu once the run loop returns
+            self.next_screen = "menu"
 
         elif event.key == pygame.K_RETURN:
-            self.__init__()
-            self.run(self.game_mode)
+            self.next_screen = "restart"
 
         elif event.key == pygame.K_z:
             message = f'{"White" if self.turn == "w" else "Black"} Surrender!'
@@ -986,31 +1030,33 @@ class Game:
 
         start_pos = (self.selected_piece.row, self.selected_piece.col)
         self.was_there_enemy = self.board.board[row][col] is not None
-        prev_piece, prev_start, prev_end = self.get_last_move()
+        # Read once: the same (piece, start, end) tuple goes to the capture test
+        # and to move_piece
+        last_move = self.get_last_move()
 
-        captured_piece = self.get_captured_piece(
-            self.selected_piece, row, col, prev_piece, prev_start, prev_end
+        # En passant is decided here, before the move, and recorded as is below
+        captured_piece, en_passant = self.get_captured_piece(
+            self.selected_piece, row, col, last_move
         )
 
-        castling_move = isinstance(self.selected_piece, King) and self.board.is_castle(
+        castling_move = self.selected_piece.type_id == KING and self.board.is_castle(
             self.selected_piece,
             (self.selected_piece.row, self.selected_piece.col),
             (row, col),
         )
 
-        promotion_move = isinstance(self.selected_piece, Pawn) and (
+        promotion_move = self.selected_piece.type_id == PAWN and (
             (self.selected_piece.color == "w" and row == 0)
             or (self.selected_piece.color == "b" and row == 7)
         )
 
-        king_moved = self.board.king_moved.copy()
-        rook_moved = self.board.rook_moved.copy()
+        castling_rights = self.board.castling_rights  # An int: no copy needed
 
         # Save halfmove_clock BEFORE the move (so undo can restore it)
         saved_halfmove = self.halfmove_clock
 
         # Update halfmove_clock for AFTER this move
-        if isinstance(self.selected_piece, Pawn) or self.was_there_enemy:
+        if self.selected_piece.type_id == PAWN or self.was_there_enemy:
             self.halfmove_clock = 0
         else:
             self.halfmove_clock += 1
@@ -1020,7 +1066,7 @@ class Game:
             self.selected_piece,
             start_pos,
             (row, col),
-            (prev_piece, prev_start, prev_end),
+            last_move,
             self,
         )
 
@@ -1034,7 +1080,7 @@ class Game:
         # Now compute position key for the new board+turn
         pos_key = self.get_position_key()
         self.position_history.append(pos_key)
-        self.position_counts[pos_key] = self.position_counts.get(pos_key, 0) + 1
+        self.position_counts[pos_key] += 1
 
         # Record move AFTER applying it
         self.move_history.append(
@@ -1043,15 +1089,9 @@ class Game:
                 "start": start_pos,
                 "end": (row, col),
                 "captured": captured_piece,
-                "en_passant": self.board.is_en_passant(
-                    self.selected_piece,
-                    (self.selected_piece.row, self.selected_piece.col),
-                    (row, col),
-                    (prev_piece, prev_start, prev_end),
-                ),
+                "en_passant": en_passant,
                 "castling": castling_move,
-                "king_moved": king_moved,
-                "rook_moved": rook_moved,
+                "castling_rights": castling_rights,
                 "promotion": promotion_move,
                 "halfmove_clock": saved_halfmove,  # stored pre-move value
                 "pos_key": pos_key,  # stored post-move key
@@ -1067,13 +1107,8 @@ class Game:
             if self.turn == self.computer_player.color:
                 self.ai_moved = False
 
-        self.board.draw(self.screen, self.flipped)
-        self.board.highlight_last_move(
-            self.screen,
-            (self.last_move_start, self.last_move_end),
-            self.was_there_enemy,
-            flipped=self.flipped,
-        )
+        # The run loop draws the board with the new last-move highlight
+        self.needs_redraw = True
 
         self.check_game_status()
 
@@ -1084,16 +1119,19 @@ class Game:
         Retrieves the best move for the AI, updates the board and move history, and
         switches the turn back to the human player.
         """
-        prev_piece, prev_start, prev_end = self.get_last_move()
-
         if self.computer_player and self.turn == self.computer_player.color:
             if self.game_mode == "pvc" and self.ai_moved:
                 return  # Prevent AI from moving multiple times in a row in PvC mode
 
-            move = self.computer_player.get_best_move(self.board)
+            move = self.computer_player.get_best_move(
+                self.board, AI_MAX_DEPTH, AI_TIME_LIMIT
+            )
             if not move:
                 return
 
+            # Read once, only when a move is actually played
+            last_move = self.get_last_move()
+
             start_pos, end_pos = move
             row, col = end_pos
             piece = self.board.board[start_pos[0]][start_pos[1]]
@@ -1103,28 +1141,25 @@ class Game:
             self.last_move_end = end_pos
             self.was_there_enemy = self.board.board[row][col] is not None
 
-            captured_piece = self.get_captured_piece(
-                piece, row, col, prev_piece, prev_start, prev_end
+            captured_piece, en_passant = self.get_captured_piece(
+                piece, row, col, last_move
             )
 
-            castling_move = isinstance(piece, King) and self.board.is_castle(
+            castling_move = piece.type_id == KING and self.board.is_castle(
                 piece, (piece.row, piece.col), (row, col)
             )
 
-            promotion_move = isinstance(piece, Pawn) and (
+            promotion_move = piece.type_id == PAWN and (
                 (piece.color == "w" and row == 0) or (piece.color == "b" and row == 7)
             )
 
-            king_moved = self.board.king_moved.copy()
-            rook_moved = self.board.rook_moved.copy()
+            castling_rights = self.board.castling_rights
 
             # Save halfmove clock BEFORE applying this move
             saved_halfmove = self.halfmove_clock
 
             # Apply move on the board
-            self.board.move_piece(
-                piece, start_pos, end_pos, (prev_piece, prev_start, prev_end)
-            )
+            self.board.move_piece(piece, start_pos, end_pos, last_move)
 
             # Update piece coordinates
             piece.row, piece.col = row, col
@@ -1133,7 +1168,7 @@ class Game:
             self.turn = "b" if self.turn == "w" else "w"
 
             # Update halfmove clock for AFTER this move
-            if isinstance(piece, Pawn) or self.was_there_enemy:
+            if piece.type_id == PAWN or self.was_there_enemy:
                 self.halfmove_clock = 0
             else:
                 self.halfmove_clock += 1
@@ -1141,7 +1176,7 @@ class Game:
             # Compute new position key (after move + new turn)
             pos_key = self.get_position_key()
             self.position_history.append(pos_key)
-            self.position_counts[pos_key] = self.position_counts.get(pos_key, 0) + 1
+            self.position_counts[pos_key] += 1
 
             # Save move to history
             self.move_history.append(
@@ -1150,15 +1185,9 @@ class Game:
                     "start": start_pos,
                     "end": (row, col),
                     "captured": captured_piece,
-                    "en_passant": self.board.is_en_passant(
-                        piece,
-                        (piece.row, piece.col),
-                        (row, col),
-                        (prev_piece, prev_start, prev_end),
-                    ),
+                    "en_passant": en_passant,
                     "castling": castling_move,
-                    "king_moved": king_moved,
-                    "rook_moved": rook_moved,
+                    "castling_rights": castling_rights,
                     "promotion": promotion_move,
                     "halfmove_clock": saved_halfmove,
                     "pos_key": pos_key,
@@ -1173,18 +1202,26 @@ class Game:
             else:
                 self.ai_moved = True  # Prevent double move in PvC
 
-            # Draw + highlight
-            self.board.draw(self.screen, self.flipped)
-            self.board.highlight_last_move(
-                self.screen,
-                (self.last_move_start, self.last_move_end),
-                self.was_there_enemy,
-                flipped=self.flipped,
-            )
+            # The run loop draws the board with the new last-move highlight
+            self.needs_redraw = True
 
             self.check_game_status()
 
-    def run(self, mode: str) -> None:
+    def play(self) -> None:
+        """
+        Top-level loop: runs the chosen mode, then shows the main menu again or starts
+        a fresh game when run asks for it, until the player quits. Menus and games
+        return here instead of calling each other, so the call stack stays flat.
+        """
+        next_screen = self.run(self.game_mode)
+        while next_screen:
+            if next_screen == "restart":
+                self.__init__()  # Fresh board, then the main menu
+            else:
+                self.setup_phase()
+            next_screen = self.run(self.game_mode)
+
+    def run(self, mode: str) -> Optional[str]:
         """
         Runs the main game loop.
 
@@ -1196,12 +1233,24 @@ class Game:
 
         Args:
             mode (str): The game mode ('help', 'pvp', 'pvc', or 'cvc').
+
+        Returns:
+            Optional[str]: "menu" to go back to the main menu, "restart" to start a new
+                game, or None when the window was closed.
         """
 
         self.game_mode = mode
+        self.next_screen = None
+
+        if self.game_mode == "help":
+            self.display_help()
+            return "menu"
 
         if self.game_mode == "pvc":
-            player_color, computer_color = self.choose_color_menu(self.screen)
+            colors = self.choose_color_menu(self.screen)
+            if colors is None:
+                return "menu"
+            player_color, computer_color = colors
             self.player_color = player_color
             self.computer_player = ComputerPlayer(computer_color)
 
@@ -1215,12 +1264,20 @@ class Game:
 
         self.initialize_game_state()
 
-        while self.running:
+        if self.game_mode == "cvc":
+            # Both AI players take turns automatically, one move per timer event
+            pygame.time.set_timer(COMPUTER_MOVE_EVENT, CVC_MOVE_DELAY, loops=1)
 
-            if self.game_mode == "help":
-                self.display_help()
+        while self.running and self.next_screen is None:
 
-            self.draw_board_and_pieces()
+            # Redraw the whole frame only when something changed; between changes
+            # only a dragged piece moves, and just its rects are updated
+            if self.needs_redraw:
+                self.draw_board_and_pieces()
+                pygame.display.flip()
+                self.needs_redraw = False
+            elif self.dragging_piece:
+                self.update_dragged_piece()
 
             if self.game_mode == "pvc":
                 if self.computer_player and self.turn == self.computer_player.color:
@@ -1229,21 +1286,24 @@ class Game:
                 else:
                     pass
 
-            elif self.game_mode == "cvc":
-                # Both AI players take turns automatically
-                pygame.time.delay(500)  # Small delay for visualization
-                self.computer_move()
-
             self.handle_events()
-            pygame.display.flip()
+            self.clock.tick(FPS)
+
+        pygame.time.set_timer(COMPUTER_MOVE_EVENT, 0)  # No move due after the game
+        return self.next_screen
 
     def check_threefold_repetition(self) -> bool:
         """
         Checks if the current position (with castling and en passant rights)
         has appeared at least 3 times.
+
+        The key counted for the current position was recorded in position_history
+        when its move was played, so this is a single dict lookup; an empty history
+        means the starting position, which has not been counted.
         """
-        current_key = self.get_position_key()
-        return self.position_counts.get(current_key, 0) >= 3
+        if not self.position_history:
+            return False
+        return self.position_counts[self.position_history[-1]] >= 3
 
     def fifty_move_rule(self) -> bool:
         """
@@ -1259,7 +1319,7 @@ class Game:
             message (str): The outcome message ("Draw", "Checkmate", or "Surrender").
             color (str): The color of the player who lost ("w" for white, "b" for black).
         """
-        font = pygame.font.Font(None, 48)
+        font = get_font(48)
 
         if message == "Draw":
             game_state = font.render("It's a draw!", True, (0, 0, 0))
@@ -1287,14 +1347,16 @@ class Game:
         pygame.display.flip()
         waiting = True
         while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+            # Block until the next event instead of polling: nothing changes on
+            # screen until a key is pressed
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_BACKSPACE:
                     pygame.quit()
                     sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_BACKSPACE:
-                        pygame.quit()
-                        sys.exit()
-                    elif event.key == pygame.K_RETURN:
-                        self.__init__()
-                        self.run(self.game_mode)
+                elif event.key == pygame.K_RETURN:
+                    self.next_screen = "restart"  # Replay once run returns
+                    waiting = False
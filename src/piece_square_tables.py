@@ -0,0 +1,139 @@
+from typing import Tuple
+
+from src.pieces import KING  # piece type ids index the tables
+
+# Material values indexed by Piece.type_id (pawn, knight, bishop, rook, queen, king)
+PIECE_VALUES = (100, 320, 330, 500, 900, 20000)
+
+
+def flatten_table(rows: Tuple[Tuple[int, ...], ...]) -> Tuple[int, ...]:
+    """
+    Flattens an 8x8 table (row 0 = black's back rank) into 64 entries indexed by
+    square = row * 8 + col.
+    """
+    return tuple(value for row in rows for value in row)
+
+
+def mirror_table(table: Tuple[int, ...]) -> Tuple[int, ...]:
+    """
+    Mirrors a flat white-perspective table for black (square ^ 56 flips the row).
+    """
+    return tuple(table[square ^ 56] for square in range(64))
+
+
+# Piece-square tables from white's perspective, flat and indexed by square
+PAWN_PST = flatten_table(
+    (
+        (0, 0, 0, 0, 0, 0, 0, 0),
+        (50, 50, 50, 50, 50, 50, 50, 50),
+        (10, 10, 20, 30, 30, 20, 10, 10),
+        (5, 5, 10, 25, 25, 10, 5, 5),
+        (0, 0, 0, 20, 20, 0, 0, 0),
+        (5, -5, -10, 0, 0, -10, -5, 5),
+        (5, 10, 10, -20, -20, 10, 10, 5),
+        (0, 0, 0, 0, 0, 0, 0, 0),
+    )
+)
+
+KNIGHT_PST = flatten_table(
+    (
+        (-50, -40, -30, -30, -30, -30, -40, -50),
+        (-40, -20, 0, 0, 0, 0, -20, -40),
+        (-30, 0, 10, 15, 15, 10, 0, -30),
+        (-30, 5, 15, 20, 20, 15, 5, -30),
+        (-30, 0, 15, 20, 20, 15, 0, -30),
+        (-30, 5, 10, 15, 15, 10, 5, -30),
+        (-40, -20, 0, 5, 5, 0, -20, -40),
+        (-50, -40, -30, -30, -30, -30, -40, -50),
+    )
+)
+
+BISHOP_PST = flatten_table(
+    (
+        (-20, -10, -10, -10, -10, -10, -10, -20),
+        (-10, 5, 0, 0, 0, 0, 5, -10),
+        (-10, 10, 10, 10, 10, 10, 10, -10),
+        (-10, 0, 10, 10, 10, 10, 0, -10),
+        (-10, 5, 5, 10, 10, 5, 5, -10),
+        (-10, 0, 5, 10, 10, 5, 0, -10),
+        (-10, 0, 0, 0, 0, 0, 0, -10),
+        (-20, -10, -10, -10, -10, -10, -10, -20),
+    )
+)
+
+ROOK_PST = flatten_table(
+    (
+        (0, 0, 0, 5, 5, 0, 0, 0),
+        (-5, 0, 0, 0, 0, 0, 0, -5),
+        (-5, 0, 0, 0, 0, 0, 0, -5),
+        (-5, 0, 0, 0, 0, 0, 0, -5),
+        (-5, 0, 0, 0, 0, 0, 0, -5),
+        (-5, 0, 0, 0, 0, 0, 0, -5),
+        (5, 10, 10, 10, 10, 10, 10, 5),
+        (0, 0, 0, 0, 0, 0, 0, 0),
+    )
+)
+
+QUEEN_PST = flatten_table(
+    (
+        (-20, -10, -10, -5, -5, -10, -10, -20),
+        (-10, 0, 5, 0, 0, 0, 0, -10),
+        (-10, 5, 5, 5, 5, 5, 0, -10),
+        (0, 0, 5, 5, 5, 5, 0, -5),
+        (-5, 0, 5, 5, 5, 5, 0, -5),
+        (-10, 0, 5, 5, 5, 5, 0, -10),
+        (-10, 0, 0, 0, 0, 0, 0, -10),
+        (-20, -10, -10, -5, -5, -10, -10, -20),
+    )
+)
+
+KING_MIDGAME_PST = flatten_table(
+    (
+        (-30, -40, -40, -50, -50, -40, -40, -30),
+        (-30, -40, -40, -50, -50, -40, -40, -30),
+        (-30, -40, -40, -50, -50, -40, -40, -30),
+        (-30, -40, -40, -50, -50, -40, -40, -30),
+        (-20, -30, -30, -40, -40, -30, -30, -20),
+        (-10, -20, -20, -20, -20, -20, -20, -10),
+        (20, 20, 0, 0, 0, 0, 20, 20),
+        (20, 30, 10, 0, 0, 10, 30, 20),
+    )
+)
+
+KING_ENDGAME_PST = flatten_table(
+    (
+        (-50, -40, -30, -20, -20, -30, -40, -50),
+        (-40, -20, -10, 0, 0, -10, -20, -40),
+        (-30, -10, 20, 30, 30, 20, -10, -30),
+        (-20, 0, 30, 40, 40, 30, 0, -20),
+        (-20, 0, 30, 40, 40, 30, 0, -20),
+        (-30, -10, 20, 30, 30, 20, -10, -30),
+        (-40, -20, -10, 0, 0, -10, -20, -40),
+        (-50, -40, -30, -20, -20, -30, -40, -50),
+    )
+)
+
+# Tables per color, indexed by Piece.type_id; black's are pre-mirrored
+PST_MIDGAME = {
+    "w": (PAWN_PST, KNIGHT_PST, BISHOP_PST, ROOK_PST, QUEEN_PST, KING_MIDGAME_PST),
+}
+PST_MIDGAME["b"] = tuple(mirror_table(table) for table in PST_MIDGAME["w"])
+PST_ENDGAME = {"w": PST_MIDGAME["w"][:KING] + (KING_ENDGAME_PST,)}
+PST_ENDGAME["b"] = tuple(mirror_table(table) for table in PST_ENDGAME["w"])
+
+# Material folded into the tables: one lookup per piece gives value + placement,
+# signed from white's point of view (black's entries are negated)
+PIECE_SQUARE_MIDGAME = {
+    color: tuple(
+        tuple(sign * (PIECE_VALUES[type_id] + bonus) for bonus in table)
+        for type_id, table in enumerate(tables)
+    )
+    for (color, tables), sign in zip(PST_MIDGAME.items(), (1, -1))
+}
+PIECE_SQUARE_ENDGAME = {
+    color: tuple(
+        tuple(sign * (PIECE_VALUES[type_id] + bonus) for bonus in table)
+        for type_id, table in enumerate(tables)
+    )
+    for (color, tables), sign in zip(PST_ENDGAME.items(), (1, -1))
+}
@@ -1,6 +1,9 @@
 from settings import *
 from typing import List, Tuple, Optional
 
+# Integer piece type ids, usable as indices into per-type lookup tables
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
 
 class Piece:
     """
@@ -11,16 +14,23 @@ class Piece:
         col (int): The column position of the piece on the board.
         color (str): The color of the piece ('w' for white, 'b' for black).
         piece_type (str): The type of the piece ('p', 'r', 'n', 'b', 'q', 'k').
+        type_id (int): Integer id of the piece type (PAWN, KNIGHT, ..., KING).
         image (pygame.Surface): The image representing the piece.
 
     Methods:
         valid_moves(board, last_move=None):
             Abstract method to be overridden by subclasses to define valid moves.
 
+        pseudo_moves(board, last_move=None):
+            Destinations before king safety is checked (all pieces but the king).
+
         draw(screen):
             Draws the piece on the board.
     """
 
+    # Fixed attribute layout: no per-instance __dict__, faster attribute access
+    __slots__ = ("row", "col", "color", "piece_type", "image")
+
     def __init__(self, row: int, col: int, color: str, piece_type: str) -> None:
         """
         Initializes a chess piece with its position, color, and type.
@@ -57,6 +67,25 @@ class Piece:
         """
         pass
 
+    def pseudo_moves(
+        self,
+        board,
+        last_move: Optional[Tuple["Piece", Tuple[int, int], Tuple[int, int]]] = None,
+    ) -> List[Tuple[int, int]]:
+        """
+        Returns the piece's destinations without checking whether they leave its own
+        king in check. valid_moves filters these through safe_moves.
+
+        Args:
+            board (Board): The board instance.
+            last_move (Optional[Tuple[Piece, Tuple[int, int], Tuple[int, int]]]):
+                The last move played, used for specific move rules (e.g., en passant).
+
+        Returns:
+            List[Tuple[int, int]]: A list of pseudo-legal destination positions.
+        """
+        pass
+
     def safe_moves(self, board, moves: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
         """
         Filter out moves that would put the King in check.
@@ -70,25 +99,39 @@ class Piece:
         """
 
         safe_moves = []
-        original_position = (self.row, self.col)
+        # is_check only reads the bitboards, the occupancy and the king positions
+        # (which a move of another piece leaves alone), so the move is simulated on
+        # the bitboards only; the board matrix and the piece are never touched
+        squares = board.board
+        bitboards = board.bitboards
+        occupied = board.occupied
+        color, type_id = self.color, self.type_id
+        own_boards = bitboards[color]
+        start_bit = 1 << (self.row * 8 + self.col)
 
         for move in moves:
             end_row, end_col = move
-            captured_piece = board.board[end_row][end_col]
+            captured_piece = squares[end_row][end_col]
+            end_bit = 1 << (end_row * 8 + end_col)
+            move_bits = start_bit | end_bit
 
             # Simulate move
-            board.board[self.row][self.col] = None
-            board.board[end_row][end_col] = self
-            self.row, self.col = end_row, end_col
+            own_boards[type_id] ^= move_bits
+            occupied[color] ^= move_bits
+            if captured_piece is not None:
+                bitboards[captured_piece.color][captured_piece.type_id] ^= end_bit
+                occupied[captured_piece.color] ^= end_bit
 
             # Check king safety
-            if not board.is_check(self.color):
+            if not board.is_check(color):
                 safe_moves.append(move)
 
             # Revert move
-            board.board[original_position[0]][original_position[1]] = self
-            board.board[end_row][end_col] = captured_piece
-            self.row, self.col = original_position
+            own_boards[type_id] ^= move_bits
+            occupied[color] ^= move_bits
+            if captured_piece is not None:
+                bitboards[captured_piece.color][captured_piece.type_id] ^= end_bit
+                occupied[captured_piece.color] ^= end_bit
 
         return safe_moves
 
@@ -101,9 +144,8 @@ class Piece:
             screen (pygame.Surface): The game screen to draw the piece on.
             flipped (bool): Whether to flip the board (black's perspective).
         """
-        piece_key = self.color + self.piece_type  # e.g., "wp" for white pawn
-
-        piece_image = PIECES[piece_key]
+        # Resolved from PIECES once in __init__, not looked up again every frame
+        piece_image = self.image
 
         # Center the piece in the square
         offset_x = (SQUARE_SIZE - piece_image.get_width()) // 2
@@ -136,6 +178,9 @@ class Pawn(Piece):
             Returns a list of valid moves for the pawn, including en passant.
     """
 
+    type_id = PAWN
+    __slots__ = ("direction", "start_row")
+
     def __init__(self, row, col, color):
         super().__init__(row, col, color, "p")
         self.direction = -1 if color == "w" else 1
@@ -153,52 +198,22 @@ class Pawn(Piece):
         Returns:
             list[tuple[int, int]]: A list of valid moves for the pawn.
         """
-        moves = []
-        forward_row = self.row + self.direction
-
-        # Normal one-step forward move
-        if 0 <= forward_row < 8 and board.board[forward_row][self.col] is None:
-            moves.append((forward_row, self.col))
-
-        # Two-step move from starting position
-        if self.row == self.start_row and board.board[forward_row][self.col] is None:
-            double_step_row = self.row + 2 * self.direction
-            if (
-                0 <= double_step_row < 8
-                and board.board[double_step_row][self.col] is None
-            ):
-                moves.append((double_step_row, self.col))
-
-        # Capture diagonally
-        for side_col in [self.col - 1, self.col + 1]:
-            if (
-                0 <= side_col < 8 and 0 <= forward_row < 8
-            ):  # Ensure forward_row is within bounds
-                if (
-                    board.board[forward_row][side_col]
-                    and board.board[forward_row][side_col].color != self.color
-                ):
-                    moves.append((forward_row, side_col))
-
-            # **En Passant Handling**
-            if last_move:
-                last_piece, last_start, last_end = last_move
-
-                if (
-                    isinstance(last_piece, Pawn)
-                    and abs(last_start[0] - last_end[0]) == 2
-                ):
-                    last_move_row, last_move_col = last_end
-
-                    # En Passant condition: the last pawn must be adjacent and in the row behind
-                    if last_move_row == self.row and abs(last_move_col - self.col) == 1:
-                        if (
-                            board.board[self.row + self.direction][last_move_col]
-                            is None
-                        ):
-                            moves.append((self.row + self.direction, last_move_col))
-
-        return self.safe_moves(board, moves)
+        return self.safe_moves(board, self.pseudo_moves(board, last_move))
+
+    def pseudo_moves(self, board, last_move=None):
+        """
+        Computes the pawn's moves, not yet checked for king safety.
+
+        Args:
+            board (Board()): Instance of the Board class.
+            last_move (tuple[Piece, tuple[int, int], tuple[int, int]] | None):
+                The last move played, used for en passant.
+
+        Returns:
+            list[tuple[int, int]]: A list of pseudo-legal moves for the pawn.
+        """
+        # Per-square push and capture tables, see Board.pawn_moves
+        return board.pawn_moves(self, last_move)
 
 
 class Rook(Piece):
@@ -206,6 +221,9 @@ class Rook(Piece):
     Represents a Rook piece.
     """
 
+    type_id = ROOK
+    __slots__ = ()
+
     def __init__(self, row, col, color):
         super().__init__(row, col, color, "r")
 
@@ -216,23 +234,16 @@ class Rook(Piece):
         Returns:
             list[tuple[int, int]]: A list of valid moves for the rook.
         """
-        moves = []
-        directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]  # Up, Down, Right, Left
+        return self.safe_moves(board, self.pseudo_moves(board))
 
-        for d_row, d_col in directions:
-            r, c = self.row, self.col
-            while 0 <= r + d_row < 8 and 0 <= c + d_col < 8:
-                r += d_row
-                c += d_col
-                if board.board[r][c] is None:
-                    moves.append((r, c))
-                elif board.board[r][c].color != self.color:
-                    moves.append((r, c))
-                    break  # Stop moving in this direction if an enemy is captured
-                else:
-                    break  # Stop moving if a friendly piece is blocking
+    def pseudo_moves(self, board, last_move=None):
+        """
+        Computes the rook's moves, not yet checked for king safety.
 
-        return self.safe_moves(board, moves)
+        Returns:
+            list[tuple[int, int]]: A list of pseudo-legal moves for the rook.
+        """
+        return board.slider_moves(self)
 
 
 class Knight(Piece):
@@ -240,6 +251,9 @@ class Knight(Piece):
     Represents a Knight piece with its unique movement pattern.
     """
 
+    type_id = KNIGHT
+    __slots__ = ()
+
     def __init__(self, row, col, color):
         super().__init__(row, col, color, "n")
 
@@ -250,25 +264,17 @@ class Knight(Piece):
         Returns:
             list[tuple[int, int]]: A list of valid moves for the knight.
         """
-        moves = []
-        knight_moves = [
-            (2, 1),
-            (2, -1),
-            (-2, 1),
-            (-2, -1),
-            (1, 2),
-            (1, -2),
-            (-1, 2),
-            (-1, -2),
-        ]
+        return self.safe_moves(board, self.pseudo_moves(board))
 
-        for d_row, d_col in knight_moves:
-            r, c = self.row + d_row, self.col + d_col
-            if 0 <= r < 8 and 0 <= c < 8:
-                if board.board[r][c] is None or board.board[r][c].color != self.color:
-                    moves.append((r, c))
+    def pseudo_moves(self, board, last_move=None):
+        """
+        Computes the knight's moves, not yet checked for king safety.
 
-        return self.safe_moves(board, moves)
+        Returns:
+            list[tuple[int, int]]: A list of pseudo-legal moves for the knight.
+        """
+        # Precomputed targets of the square, see Board.step_moves
+        return board.step_moves(self)
 
 
 class Bishop(Piece):
@@ -276,6 +282,9 @@ class Bishop(Piece):
     Represents a Bishop piece that moves diagonally.
     """
 
+    type_id = BISHOP
+    __slots__ = ()
+
     def __init__(self, row, col, color):
         super().__init__(row, col, color, "b")
 
@@ -286,23 +295,16 @@ class Bishop(Piece):
         Returns:
             list[tuple[int, int]]: A list of valid moves for the bishop.
         """
-        moves = []
-        directions = [(1, 1), (-1, -1), (1, -1), (-1, 1)]  # Diagonal directions
+        return self.safe_moves(board, self.pseudo_moves(board))
 
-        for d_row, d_col in directions:
-            r, c = self.row, self.col
-            while 0 <= r + d_row < 8 and 0 <= c + d_col < 8:
-                r += d_row
-                c += d_col
-                if board.board[r][c] is None:
-                    moves.append((r, c))
-                elif board.board[r][c].color != self.color:
-                    moves.append((r, c))
-                    break
-                else:
-                    break
+    def pseudo_moves(self, board, last_move=None):
+        """
+        Computes the bishop's moves, not yet checked for king safety.
 
-        return self.safe_moves(board, moves)
+        Returns:
+            list[tuple[int, int]]: A list of pseudo-legal moves for the bishop.
+        """
+        return board.slider_moves(self)
 
 
 class Queen(Piece):
@@ -310,37 +312,18 @@ class Queen(Piece):
     Represents a Queen piece, combining Rook and Bishop movements.
     """
 
+    type_id = QUEEN
+    __slots__ = ()
+
     def __init__(self, row, col, color):
         super().__init__(row, col, color, "q")
 
     def valid_moves(self, board, last_move=None):
-        moves = []
-
-        # Use the Queen's position to simulate Rook and Bishop moves
-        directions = [
-            (-1, 0),
-            (1, 0),
-            (0, -1),
-            (0, 1),  # Rook-like moves (vertical & horizontal)
-            (-1, -1),
-            (-1, 1),
-            (1, -1),
-            (1, 1),  # Bishop-like moves (diagonal)
-        ]
+        return self.safe_moves(board, self.pseudo_moves(board))
 
-        for drow, dcol in directions:
-            r, c = self.row + drow, self.col + dcol
-            while 0 <= r < 8 and 0 <= c < 8:
-                piece = board.board[r][c]
-                if piece:
-                    if piece.color != self.color:  # Capture opponent's piece
-                        moves.append((r, c))
-                    break  # Stop if there's a piece blocking
-                moves.append((r, c))
-                r += drow
-                c += dcol
-
-        return self.safe_moves(board, moves)
+    def pseudo_moves(self, board, last_move=None):
+        # Rook and bishop rays together, see Board.slider_moves
+        return board.slider_moves(self)
 
 
 class King(Piece):
@@ -348,29 +331,20 @@ class King(Piece):
     Represents a King piece that moves one step in any direction.
     """
 
+    type_id = KING
+    __slots__ = ()
+
     def __init__(self, row, col, color):
         super().__init__(row, col, color, "k")
 
     def valid_moves(self, board, last_move=None):
-        moves = []
-        directions = [
-            (1, 0),
-            (-1, 0),
-            (0, 1),
-            (0, -1),
-            (1, 1),
-            (-1, -1),
-            (1, -1),
-            (-1, 1),
+        # One-step targets not held by its own side, then king safety
+        moves = [
+            move
+            for move in board.step_moves(self)
+            if not board.is_check_after_move(self, move)
         ]
 
-        for d_row, d_col in directions:
-            r, c = self.row + d_row, self.col + d_col
-            if 0 <= r < 8 and 0 <= c < 8:
-                if board.board[r][c] is None or board.board[r][c].color != self.color:
-                    if not board.is_check_after_move(self, (r, c)):
-                        moves.append((r, c))
-
         # ✅ Check for castling rights
         castling = board.can_castle(
             self.color